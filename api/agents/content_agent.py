@@ -4,16 +4,15 @@ from iointel import (
     Workflow,
     register_tool
 )
-from duckduckgo_search import DDGS
 from model_list import models
-import re
-import os
+from text_utils import clean_post
+from rate_limit import estimate_tokens
 import asyncio
-from dotenv import load_dotenv
-load_dotenv()
+import json
+from config import settings
 
-IO_API_KEY = os.getenv("IO_API_KEY")
-BASE_ENDPOINT = os.getenv("BASE_ENDPOINT")
+IO_API_KEY = settings.io_api_key
+BASE_ENDPOINT = settings.base_endpoint
 
 CONTENT_AGENT_INSTRUCTIONS = (
     "You are an assistant specialized in creating catchy social media posts. "
@@ -23,16 +22,8 @@ CONTENT_AGENT_INSTRUCTIONS = (
     "Make sure the post is suitable for a social media platform like Twitter."
     "Don't think too much and don't return your thoughts, just return the content of the post."
 )
-def parse_thoughts_and_content(text):
-    # Find all thoughts
-    thoughts = re.findall(r"<think>(.*?)</think>", text, re.DOTALL)
-
-    # Remove the thoughts from the original string
-    non_thoughts = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
-
-    return thoughts, [non_thoughts] if non_thoughts else []
-
-async def get_agent_response(text: str, persona: any):
+async def get_agent_response(text: str, persona: any) -> tuple[str, int]:
+    """Returns the cleaned post and the LLM tokens the exchange is estimated to have used."""
     # persona config has name age role, style, domain_knowledge, quirks bio lore personality, conversation_style, description, emotional_stability
     #friendliness, curiosity, creativtity ,humor, formality, empathy
     persona_config = PersonaConfig(
@@ -63,14 +54,19 @@ async def get_agent_response(text: str, persona: any):
         base_url=BASE_ENDPOINT
     )
     
+    task_objective = "Create a social media post based on the objective"
     workflow = Workflow(objective=text, client_mode=False)
     async def run_workflow():
-        results = (await workflow.custom(name="create-social-media-post", objective="Create a social media post based on the objective", instructions=CONTENT_AGENT_INSTRUCTIONS, agents=[content_agent]).run_tasks())["results"]['create-social-media-post']
-        # remove thoughts from the results
-        # the thoughts are enclosed in <think> </think>
+        results = (await workflow.custom(name="create-social-media-post", objective=task_objective, instructions=CONTENT_AGENT_INSTRUCTIONS, agents=[content_agent]).run_tasks())["results"]['create-social-media-post']
         print(results)
-        thoughts, content = parse_thoughts_and_content(results)
-        return content[0] if content else ""
+        return results
 
-    results = await run_workflow()
-    return results
+    raw_results = await run_workflow()
+    # Quota counts the whole exchange: the instructions (agent and task), the
+    # persona prompt and the raw output including its <think> reasoning
+    tokens_used = estimate_tokens(
+        CONTENT_AGENT_INSTRUCTIONS, CONTENT_AGENT_INSTRUCTIONS, json.dumps(persona_config.dict()),
+        task_objective, str(text), raw_results,
+    )
+    # remove thoughts from the results, tidy hashtags and fit the platform limit
+    return clean_post(raw_results), tokens_used
@@ -4,14 +4,13 @@ from iointel import (
     Workflow
 )
 from model_list import models
-import re
-import os
+from text_utils import JSON_OBJECT_RE, strip_thoughts
+from rate_limit import estimate_tokens
 import json
-from dotenv import load_dotenv
-load_dotenv()
+from config import settings
 
-IO_API_KEY = os.getenv("IO_API_KEY")
-BASE_ENDPOINT = os.getenv("BASE_ENDPOINT")
+IO_API_KEY = settings.io_api_key
+BASE_ENDPOINT = settings.base_endpoint
 
 # the persona agent will create a persona based on the sample post of the user. The output should be a json structure with the fields in PersonaConfig
 PERSONA_AGENT_INSTRUCTIONS = (
@@ -28,8 +27,8 @@ def extract_persona_json(text: str):
     Extracts the JSON structure
     from the text that contains the persona information.
     """
-    # Use regex to find the JSON structure in the text
-    match = re.search(r'\{.*?\}', text, re.DOTALL)
+    # Drop the reasoning first so braces inside <think> can't be matched
+    match = JSON_OBJECT_RE.search(strip_thoughts(text))
     if match:
         json_str = match.group(0)
         try:
@@ -40,7 +39,8 @@ def extract_persona_json(text: str):
             print("Failed to decode JSON from the text.")
     return None
 
-async def get_agent_response(sample_post: str):
+async def get_agent_response(sample_post: str) -> tuple[dict, int]:
+    """Returns the generated persona fields and the LLM tokens the exchange is estimated to have used."""
     # persona config has name age role, style, domain_knowledge, quirks bio lore personality, conversation_style, description, emotional_stability
     #friendliness, curiosity, creativtity ,humor, formality, empathy
     content_agent = Agent(
@@ -51,13 +51,18 @@ async def get_agent_response(sample_post: str):
         base_url=BASE_ENDPOINT
     )
     
+    task_objective = "Create a persona based on the sample prompt given"
     workflow = Workflow(objective=sample_post, client_mode=False)
     async def run_workflow():
-        results = (await workflow.custom(name="create-persona", objective="Create a persona based on the sample prompt given", instructions=PERSONA_AGENT_INSTRUCTIONS, agents=[content_agent]).run_tasks())["results"]['create-persona']
+        results = (await workflow.custom(name="create-persona", objective=task_objective, instructions=PERSONA_AGENT_INSTRUCTIONS, agents=[content_agent]).run_tasks())["results"]['create-persona']
         print(results)
         return results
 
     results = await run_workflow()
+    # Instructions are sent twice (agent and task); the raw output includes the reasoning
+    tokens_used = estimate_tokens(
+        PERSONA_AGENT_INSTRUCTIONS, PERSONA_AGENT_INSTRUCTIONS, task_objective, sample_post, results
+    )
     persona_json = extract_persona_json(results)
     persona  = None
     if persona_json is None:
@@ -85,4 +90,4 @@ async def get_agent_response(sample_post: str):
         empathy=persona.get("empathy", 1)  
     )
     # return persona_config
-    return persona_config.dict()
\ No newline at end of file
+    return persona_config.dict(), tokens_used
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Incrementally maintained per-persona analytics.
+
+Each state change bumps counters with $inc in two places: an all-time document
+per (user, persona) in `persona_stats` and a daily bucket in `persona_rollups`.
+Reads are then single indexed lookups; nothing aggregates `messages`.
+"""
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ASCENDING
+from pymongo.database import Database
+
+# Counters maintained per persona; rates and averages are derived on read
+COUNTERS = ("generated", "generation_ms_total", "scheduled", "rescheduled", "unscheduled", "posted", "failed")
+
+
+def ensure_analytics_indexes(db: Database):
+    db.persona_stats.create_index([("username", ASCENDING), ("persona_name", ASCENDING)])
+    db.persona_rollups.create_index([("username", ASCENDING), ("persona_name", ASCENDING), ("day", ASCENDING)])
+
+
+def record(db: Database, username: str, persona_name: str, **counters: float):
+    """
+    Atomically adds `counters` (e.g. posted=1) to the persona's totals and
+    today's bucket. Documents are keyed by compound _ids: usernames and
+    persona names are free-form, so joining them into a string could collide.
+    """
+    now = datetime.now(timezone.utc)
+    day = now.strftime("%Y-%m-%d")
+    db.persona_stats.update_one(
+        {"_id": {"username": username, "persona_name": persona_name}},
+        {
+            "$inc": counters,
+            "$set": {"updated_at": now},
+            "$setOnInsert": {"username": username, "persona_name": persona_name},
+        },
+        upsert=True,
+    )
+    db.persona_rollups.update_one(
+        {"_id": {"username": username, "persona_name": persona_name, "day": day}},
+        {
+            "$inc": counters,
+            "$setOnInsert": {"username": username, "persona_name": persona_name, "day": day},
+        },
+        upsert=True,
+    )
+
+
+def summarize(doc: dict) -> dict:
+    """Counters from a stats or rollup document plus derived success rate and mean latency."""
+    out = {counter: doc.get(counter, 0) for counter in COUNTERS}
+    completed = out["posted"] + out["failed"]
+    out["success_rate"] = out["posted"] / completed if completed else None
+    out["avg_generation_ms"] = out["generation_ms_total"] / out["generated"] if out["generated"] else None
+    return out
+
+
+def persona_stats(db: Database, username: str) -> list[dict]:
+    docs = db.persona_stats.find({"username": username}).sort("persona_name", ASCENDING)
+    return [{"persona_name": doc["persona_name"], **summarize(doc)} for doc in docs]
+
+
+def persona_rollups(db: Database, username: str, persona_name: str, days: int) -> list[dict]:
+    first_day = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    docs = db.persona_rollups.find(
+        {"username": username, "persona_name": persona_name, "day": {"$gte": first_day}}
+    ).sort("day", ASCENDING)
+    return [{"day": doc["day"], **summarize(doc)} for doc in docs]
@@ -0,0 +1,60 @@
+"""
+Microbenchmark: serializing 10k `messages` documents.
+
+Compares the old path (validate every document through List[Message] and dump
+it with Pydantic, which is what response_model did) against the fast path in
+serializers.py (plain dict conversion + orjson).
+
+Run from the api/ directory:
+    python -m bench.bench_serialization [count]
+"""
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+import orjson
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+from main import Message
+from serializers import serialize_message
+
+
+def make_docs(count: int) -> list[dict]:
+    start = datetime(2025, 1, 1, 9)
+    docs = []
+    for i in range(count):
+        doc = {
+            "_id": ObjectId(),
+            "text": f"Post number {i} about decentralized social media #nostr #web3",
+            "username": "bench",
+            "sender": "bot",
+            "persona_name": f"persona-{i % 5}",
+        }
+        if i % 3:
+            doc.update(schedule_status="scheduled", scheduled_time=start + timedelta(days=i % 90), task_id=f"post-task-{i}")
+        docs.append(doc)
+    return docs
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    docs = make_docs(count)
+    adapter = TypeAdapter(list[Message])
+
+    def pydantic_path():
+        return adapter.dump_json(adapter.validate_python(docs), by_alias=True)
+
+    def fast_path():
+        return orjson.dumps([serialize_message(doc) for doc in docs])
+
+    assert orjson.loads(pydantic_path()) == orjson.loads(fast_path()), "serializers disagree"
+
+    for name, fn in (("pydantic validate+dump", pydantic_path), ("serialize_message+orjson", fast_path)):
+        runs = 10
+        best = min(timeit.repeat(fn, number=1, repeat=runs))
+        print(f"{name:<28} {count} docs  best of {runs}: {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: flushing one publish slot of pre-signed posts.
+
+Enqueues N posts due now (signing happens here, as at schedule time), then
+times publish_queue.flush_due publishing them through one connection to a
+local stub relay. With --baseline it also times the old path: one
+post_to_nostr_util call per post, which re-parses the key, signs and opens
+its own relay connection at publish time.
+
+Run from the api/ directory (extra deps in bench/requirements.txt):
+    python -m bench.bench_slot_flush --posts 1000 [--redis-url redis://localhost:6379/15] [--baseline]
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+RELAY_PORT = 7448
+
+
+async def run(args):
+    from bench.harness import BackgroundLoop
+    from bench.stub_relay import StubRelay
+    from config import settings
+    import publish_queue
+
+    relay = StubRelay(args.relay_ack_delay_ms)
+    relay_thread = BackgroundLoop(lambda: relay.serve("127.0.0.1", RELAY_PORT), "stub-relay").start()
+
+    if args.redis_url:
+        import redis.asyncio as aioredis
+        redis_client = aioredis.from_url(args.redis_url)
+        await redis_client.flushdb()
+    else:
+        import fakeredis
+        redis_client = fakeredis.aioredis.FakeRedis()
+
+    try:
+        due = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        for i in range(args.posts):
+            await publish_queue.enqueue(redis_client, f"{i:024x}", f"Scheduled bench post {i} #nostr", due)
+        presign_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        handled = await publish_queue.flush_due(redis_client)
+        flush_s = time.perf_counter() - start
+
+        outcomes = await redis_client.lrange(settings.task_updates_queue, 0, -1)
+        posted = sum(1 for raw in outcomes if b'"status": "posted"' in raw)
+        print(f"pre-sign + enqueue {args.posts} posts: {presign_s * 1000:9.1f} ms")
+        print(f"flush slot ({handled} posts, concurrency {settings.publish_concurrency}): {flush_s * 1000:9.1f} ms"
+              f"  -> {handled / flush_s:.0f} posts/s, {posted} acked, relay saw {relay.events_received}")
+
+        if args.baseline:
+            from nostr_utils import post_to_nostr_util
+            semaphore = asyncio.Semaphore(settings.publish_concurrency)
+
+            async def post(i: int):
+                async with semaphore:
+                    await post_to_nostr_util(f"Unsigned bench post {i} #nostr")
+
+            start = time.perf_counter()
+            await asyncio.gather(*(post(i) for i in range(args.posts)))
+            baseline_s = time.perf_counter() - start
+            print(f"baseline (sign + connect per post): {baseline_s * 1000:9.1f} ms"
+                  f"  -> {args.posts / baseline_s:.0f} posts/s")
+    finally:
+        await redis_client.close()
+        relay_thread.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--relay-ack-delay-ms", type=float, default=0.0)
+    parser.add_argument("--redis-url", help="use a real Redis database (it is flushed) instead of fakeredis")
+    parser.add_argument("--baseline", action="store_true")
+    args = parser.parse_args()
+
+    # Read by config.settings at import time
+    os.environ["NOSTR_RELAYS"] = f"ws://127.0.0.1:{RELAY_PORT}"
+    if "NOSTR_SECRET_KEY" not in os.environ:
+        from nostr_sdk import Keys
+        os.environ["NOSTR_SECRET_KEY"] = Keys.generate().secret_key().to_hex()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Microbenchmark: think-tag stripping on large reasoning outputs.
+
+Compares the previous approach (two uncompiled regex passes followed by the
+rfind("</think>") fallback from main.chat) with text_utils.split_thoughts and
+the streaming ThinkStreamStripper fed in small chunks.
+
+Run from the api/ directory:
+    python -m bench.bench_text [thought_kb]
+"""
+import re
+import sys
+import timeit
+
+from text_utils import ThinkStreamStripper, clean_post, split_thoughts
+
+
+def legacy_strip(text: str) -> str:
+    re.findall(r"<think>(.*?)</think>", text, re.DOTALL)
+    content = re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
+    if "</think>" in content:
+        content = content[content.rfind("</think>") + len("</think>"):].lstrip()
+    return content
+
+
+def streamed_strip(text: str, chunk_size: int = 32) -> str:
+    stripper = ThinkStreamStripper()
+    for i in range(0, len(text), chunk_size):
+        stripper.feed(text[i:i + chunk_size])
+    return stripper.finish().strip()
+
+
+# Stray closing tags (opening tag omitted) around and after well-formed blocks
+EDGE_CASES = [
+    "reasoning here</think>post",
+    "a</think>b</think>post",
+    "<think>x</think>hello</think> world",
+    "x<think>y</think>z",
+    "plain text",
+]
+
+
+def make_output(thought_kb: int) -> str:
+    reasoning = ("Let me consider the persona's tone and the topic carefully. " * 17)[:1024]
+    post = "Decentralized social media gives you back your voice. #Nostr #Web3 #nostr"
+    return f"<think>{reasoning * thought_kb}</think>\n\n{post}"
+
+
+def main():
+    thought_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    text = make_output(thought_kb)
+    assert legacy_strip(text) == split_thoughts(text)[1] == streamed_strip(text)
+    for case in EDGE_CASES:
+        for chunk_size in (1, 3, 32):
+            assert legacy_strip(case) == split_thoughts(case)[1] == streamed_strip(case, chunk_size), case
+
+    for name, fn in (
+        ("legacy regex", lambda: legacy_strip(text)),
+        ("split_thoughts", lambda: split_thoughts(text)),
+        ("ThinkStreamStripper (32B)", lambda: streamed_strip(text)),
+        ("clean_post", lambda: clean_post(text)),
+    ):
+        best = min(timeit.repeat(fn, number=10, repeat=5)) / 10
+        print(f"{name:<28} {thought_kb} KB reasoning: {best * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
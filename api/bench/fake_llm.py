@@ -0,0 +1,85 @@
+"""
+Fake OpenAI-compatible LLM server for offline benchmarks.
+
+Serves /v1/chat/completions (plain and streamed) and /v1/models with a fixed
+reasoning block plus a short post, after a configurable delay, so the agents
+can be driven without the iointel endpoint. Point BASE_ENDPOINT at it.
+
+    python -m bench.fake_llm --port 8100 --latency-ms 400
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import orjson
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+REASONING = "<think>" + "The persona is upbeat; keep it short and add hashtags. " * 40 + "</think>\n\n"
+POST = "Decentralized social media puts you back in charge of your audience. #Nostr #Web3"
+PERSONA_JSON = orjson.dumps({
+    "name": "Bench Persona", "age": 30, "role": "Community Manager", "style": "Casual",
+    "quirks": "Loves puns", "bio": "Benchmark persona.", "lore": "Generated offline.",
+    "personality": "Friendly", "conversation_style": "Conversational",
+    "emotional_stability": 0.7, "friendliness": 0.9, "curiosity": 0.6, "creativity": 0.8,
+    "humor": 0.5, "formality": 0.2, "empathy": 0.7,
+}).decode("utf-8")
+
+
+def create_app(latency_ms: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    app.state.latency = latency_ms / 1000
+    app.state.requests = 0
+
+    def completion_text(body: dict) -> str:
+        prompt = orjson.dumps(body.get("messages", [])).decode("utf-8").lower()
+        return REASONING + (PERSONA_JSON if "persona" in prompt and "sample post" in prompt else POST)
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "deepseek-ai/DeepSeek-R1-0528", "object": "model"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = orjson.loads(await request.body())
+        app.state.requests += 1
+        await asyncio.sleep(app.state.latency)
+        text = completion_text(body)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get("model", "fake")
+        usage = {"prompt_tokens": 100, "completion_tokens": len(text) // 4, "total_tokens": 100 + len(text) // 4}
+
+        if body.get("stream"):
+            async def events():
+                for i in range(0, len(text), 64):
+                    chunk = {
+                        "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": {"role": "assistant", "content": text[i:i + 64]}, "finish_reason": None}],
+                    }
+                    yield b"data: " + orjson.dumps(chunk) + b"\n\n"
+                final = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage,
+                }
+                yield b"data: " + orjson.dumps(final) + b"\n\ndata: [DONE]\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        return ORJSONResponse({
+            "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms), host=args.host, port=args.port, log_level="warning")
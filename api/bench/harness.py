@@ -0,0 +1,130 @@
+"""Shared helpers for the benchmark scripts: background services and latency stats."""
+import asyncio
+import math
+import threading
+import time
+
+import uvicorn
+
+
+class BackgroundLoop(threading.Thread):
+    """Runs a coroutine on its own event loop in a daemon thread."""
+
+    def __init__(self, coro_factory, name: str):
+        super().__init__(name=name, daemon=True)
+        self.coro_factory = coro_factory
+        self.loop = asyncio.new_event_loop()
+        self._task = None
+        self._ready = threading.Event()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self._task = self.loop.create_task(self.coro_factory())
+        self.loop.call_soon(self._ready.set)
+        try:
+            self.loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop.close()
+
+    def start(self, settle: float = 0.2):
+        super().start()
+        self._ready.wait()
+        time.sleep(settle)
+        return self
+
+    def submit(self, coro):
+        """Schedules `coro` on this loop and returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self):
+        if self._task is not None:
+            self.loop.call_soon_threadsafe(self._task.cancel)
+        self.join(timeout=5)
+
+
+class UvicornThread(BackgroundLoop):
+    """Serves an ASGI app with uvicorn from a background thread."""
+
+    def __init__(self, app, host: str, port: int, name: str):
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="on"))
+        super().__init__(self.server.serve, name=name)
+
+    def start(self, settle: float = 0.0):
+        super().start(settle)
+        deadline = time.monotonic() + 30
+        while not self.server.started:
+            if not self.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError(f"{self.name} failed to start")
+            time.sleep(0.05)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.join(timeout=10)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """Collects per-operation latencies and errors for one scenario."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.elapsed = 0.0
+
+    async def time(self, coro):
+        start = time.perf_counter()
+        try:
+            result = await coro
+        except Exception as e:
+            self.errors += 1
+            if self.errors <= 3:
+                print(f"[{self.name}] error: {e!r}")
+            return None
+        self.latencies.append(time.perf_counter() - start)
+        return result
+
+    def summary(self) -> dict:
+        ordered = sorted(self.latencies)
+        done = len(ordered)
+        return {
+            "scenario": self.name,
+            "ok": done,
+            "errors": self.errors,
+            "throughput_rps": done / self.elapsed if self.elapsed else 0.0,
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+        }
+
+
+async def run_concurrently(recorder: Recorder, count: int, concurrency: int, make_call):
+    """Runs make_call(i) for i in range(count) with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    results = [None] * count
+
+    async def one(i: int):
+        async with semaphore:
+            results[i] = await recorder.time(make_call(i))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    recorder.elapsed = time.perf_counter() - start
+    return results
+
+
+def print_report(summaries: list[dict]):
+    print(f"\n{'scenario':<18}{'ok':>8}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for row in summaries:
+        print(
+            f"{row['scenario']:<18}{row['ok']:>8}{row['errors']:>8}"
+            f"{row['throughput_rps']:>10.1f}{row['p50_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+        )
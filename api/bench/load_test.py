@@ -0,0 +1,271 @@
+"""
+Offline load test for the whole API.
+
+Starts a fake OpenAI-compatible LLM (bench.fake_llm), a stub Nostr relay
+(bench.stub_relay) and the API itself in-process, backed by mongomock and
+fakeredis unless --real-services is given (then MONGO_URI and a local Redis
+are used). It then drives login, /api/chat, /api/messages, /api/schedule,
+/api/calendar, /api/analytics/personas, /api/nostr/post and /ws, including
+change events fanned out through the change feed, and reports throughput and
+p50/p99 latency.
+
+Celery runs on the in-memory broker, so /api/schedule is measured up to the
+point the task is queued; no worker executes it.
+
+Run from the api/ directory (extra deps in bench/requirements.txt):
+    python -m bench.load_test --users 20 --requests 500 --concurrency 50 --llm-latency-ms 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+API_HOST = "127.0.0.1"
+
+
+def configure_env(args):
+    """Must run before main is imported: these are read at import time."""
+    os.environ.update({
+        "BASE_ENDPOINT": f"http://{API_HOST}:{args.llm_port}/v1",
+        "IO_API_KEY": "bench",
+        "SECRET_KEY": "bench-secret",
+        "NOSTR_RELAYS": f"ws://{API_HOST}:{args.relay_port}",
+        "RATE_LIMITS": "chat=1000000/1000000,persona_generate=1000000/1000000,nostr_post=1000000/1000000",
+        "DAILY_TOKEN_QUOTA": str(10**12),
+        "CELERY_BROKER_URL": "memory://",
+        "CELERY_RESULT_BACKEND": "cache+memory://",
+    })
+    if "NOSTR_SECRET_KEY" not in os.environ:
+        from nostr_sdk import Keys
+        os.environ["NOSTR_SECRET_KEY"] = Keys.generate().secret_key().to_hex()
+
+
+def use_local_stand_ins(main_module):
+    """Swaps MongoDB and Redis for mongomock and fakeredis inside the API process."""
+    import fakeredis
+    import mongomock
+
+    main_module.MongoClient = mongomock.MongoClient
+    main_module.create_redis_client = lambda: fakeredis.aioredis.FakeRedis(decode_responses=False)
+
+
+async def setup_users(client, count: int) -> list[dict]:
+    users = []
+    for i in range(count):
+        username, password = f"bench-user-{i}", "bench-password"
+        response = await client.post("/api/register", json={"username": username, "password": password})
+        if response.status_code not in (201, 400):
+            response.raise_for_status()
+        users.append({"username": username, "password": password, "persona": f"bench-persona-{i}"})
+    return users
+
+
+def persona_payload(name: str) -> dict:
+    return {
+        "name": name, "age": 30, "role": "Community Manager", "style": "Casual",
+        "emotional_stability": 0.5, "friendliness": 0.5, "creativity": 0.5, "curiosity": 0.5,
+        "formality": 0.5, "empathy": 0.5, "humor": 0.5,
+    }
+
+
+async def drive(args, summaries: list[dict]):
+    import httpx
+    import websockets
+
+    from bench.harness import Recorder, run_concurrently
+
+    base_url = f"http://{API_HOST}:{args.api_port}"
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        users = await setup_users(client, args.users)
+
+        async def login(i: int):
+            user = users[i % len(users)]
+            response = await client.post("/api/token", data={"username": user["username"], "password": user["password"]})
+            response.raise_for_status()
+            user["token"] = response.json()["access_token"]
+            user["headers"] = {"Authorization": f"Bearer {user['token']}"}
+
+        recorder = Recorder("login")
+        await run_concurrently(recorder, max(args.users, args.logins), args.concurrency, login)
+        summaries.append(recorder.summary())
+
+        for user in users:
+            response = await client.post("/api/personas", json=persona_payload(user["persona"]), headers=user["headers"])
+            response.raise_for_status()
+
+        async def chat(i: int):
+            user = users[i % len(users)]
+            body = {
+                "persona_name": user["persona"],
+                "last_user_message": {
+                    "_id": "0" * 24, "text": f"Write a post about topic {i}", "username": user["username"],
+                    "sender": "user", "persona_name": user["persona"],
+                },
+            }
+            response = await client.post("/api/chat", json=body, headers=user["headers"])
+            response.raise_for_status()
+            return response.json()["_id"], user
+
+        recorder = Recorder("chat")
+        generated = [r for r in await run_concurrently(recorder, args.requests, args.concurrency, chat) if r]
+        summaries.append(recorder.summary())
+
+        async def list_messages(i: int):
+            user = users[i % len(users)]
+            response = await client.get("/api/messages", params={"persona_name": user["persona"]}, headers=user["headers"])
+            response.raise_for_status()
+
+        recorder = Recorder("list_messages")
+        await run_concurrently(recorder, args.requests, args.concurrency, list_messages)
+        summaries.append(recorder.summary())
+
+        start_date = (datetime.now(timezone.utc) + timedelta(days=7)).isoformat()
+
+        async def schedule(i: int):
+            message_id, user = generated[i]
+            response = await client.post("/api/schedule", json={"message_id": message_id, "start_date": start_date}, headers=user["headers"])
+            response.raise_for_status()
+
+        recorder = Recorder("schedule")
+        await run_concurrently(recorder, len(generated), args.concurrency, schedule)
+        summaries.append(recorder.summary())
+
+        calendar_range = {
+            "start": datetime.now(timezone.utc).isoformat(),
+            "end": (datetime.now(timezone.utc) + timedelta(days=31)).isoformat(),
+        }
+
+        async def calendar(i: int):
+            user = users[i % len(users)]
+            response = await client.get("/api/calendar", params=calendar_range, headers=user["headers"])
+            response.raise_for_status()
+
+        recorder = Recorder("calendar")
+        await run_concurrently(recorder, args.requests, args.concurrency, calendar)
+        summaries.append(recorder.summary())
+
+        async def persona_analytics(i: int):
+            user = users[i % len(users)]
+            response = await client.get("/api/analytics/personas", headers=user["headers"])
+            response.raise_for_status()
+
+        recorder = Recorder("persona_analytics")
+        await run_concurrently(recorder, args.requests, args.concurrency, persona_analytics)
+        summaries.append(recorder.summary())
+
+        async def nostr_post(i: int):
+            user = users[i % len(users)]
+            response = await client.post("/api/nostr/post", json={"content": f"bench note {i}"}, headers=user["headers"])
+            response.raise_for_status()
+
+        recorder = Recorder("nostr_post")
+        await run_concurrently(recorder, args.nostr_posts, args.concurrency, nostr_post)
+        summaries.append(recorder.summary())
+
+    ws_url = f"ws://{API_HOST}:{args.api_port}/ws"
+    sockets = []
+
+    async def connect(i: int):
+        ws = await websockets.connect(f"{ws_url}?token={users[i % len(users)]['token']}")
+        await ws.recv()  # hello
+        sockets.append((users[i % len(users)], ws))
+
+    recorder = Recorder("ws_connect")
+    await run_concurrently(recorder, args.ws_clients, args.concurrency, connect)
+    summaries.append(recorder.summary())
+    return sockets
+
+
+async def measure_change_delivery(args, api, api_thread, sockets, summaries: list[dict]):
+    """
+    Times one round of change events, one per connected user, from emit_change
+    (outbox write + Redis publish) through change_listener until every socket
+    has received its user's event.
+    """
+    from bson import ObjectId
+
+    from bench.harness import Recorder
+    from change_feed import emit_change
+
+    users = list({user["username"]: user for user, _ in sockets}.values())
+    recorder = Recorder("ws_change_delivery")
+    start_all = time.perf_counter()
+    for i in range(args.change_rounds):
+        async def emit_round():
+            for user in users:
+                message_doc = {
+                    "_id": ObjectId(), "text": f"bench change {i}", "sender": "bot",
+                    "username": user["username"], "persona_name": user["persona"], "schedule_status": "posted",
+                }
+                await emit_change(api.app.mongodb, api.app.redis, message_doc)
+
+        async def deliver():
+            await asyncio.wrap_future(api_thread.submit(emit_round()))
+            await asyncio.gather(*(ws.recv() for _, ws in sockets))
+
+        await recorder.time(deliver())
+    recorder.elapsed = time.perf_counter() - start_all
+    summaries.append(recorder.summary())
+    for _, ws in sockets:
+        await ws.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--nostr-posts", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--ws-clients", type=int, default=200)
+    parser.add_argument("--change-rounds", type=int, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--relay-ack-delay-ms", type=float, default=0.0)
+    parser.add_argument("--api-port", type=int, default=8000)
+    parser.add_argument("--llm-port", type=int, default=8100)
+    parser.add_argument("--relay-port", type=int, default=7447)
+    parser.add_argument("--real-services", action="store_true", help="use MONGO_URI and a local Redis instead of mongomock/fakeredis")
+    parser.add_argument("--json", help="also write the summaries to this file")
+    args = parser.parse_args()
+
+    configure_env(args)
+
+    from bench.fake_llm import create_app as create_fake_llm
+    from bench.harness import BackgroundLoop, UvicornThread, print_report
+    from bench.stub_relay import StubRelay
+
+    import main as api
+
+    if not args.real_services:
+        use_local_stand_ins(api)
+
+    relay = StubRelay(args.relay_ack_delay_ms)
+    services = [
+        UvicornThread(create_fake_llm(args.llm_latency_ms), API_HOST, args.llm_port, "fake-llm").start(),
+        BackgroundLoop(lambda: relay.serve(API_HOST, args.relay_port), "stub-relay").start(),
+    ]
+    api_thread = UvicornThread(api.app, API_HOST, args.api_port, "api").start()
+    services.append(api_thread)
+
+    summaries: list[dict] = []
+    try:
+        async def run():
+            sockets = await drive(args, summaries)
+            await measure_change_delivery(args, api, api_thread, sockets, summaries)
+        asyncio.run(run())
+    finally:
+        for service in reversed(services):
+            service.stop()
+
+    print_report(summaries)
+    print(f"\nrelay received {relay.events_received} events")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Multi-worker check: each task outcome applied once, and scaling.
+
+For each worker count, starts that many API processes (uvicorn, separate
+ports) against a local MongoDB (MONGO_URI) and Redis (REDIS_URL) in a scratch
+database, pushes one "posted" outcome per message onto the task updates
+queue the way the Celery worker does, and waits until every message is
+posted. The workers get their own queue (TASK_UPDATES_QUEUE), so a dev API or
+Celery worker sharing that Redis is left alone. It then checks the
+change-feed outbox: exactly one event per message means each outcome was
+applied once, by one process.
+
+With --kill-one, one worker is SIGKILLed once a third of the outcomes are
+posted, while it still holds some. The rest must then reclaim its processing
+list after the heartbeat expires (TASK_UPDATES_HEARTBEAT_SECONDS is shortened
+for the run), so nothing may be missing. A duplicate event is allowed there:
+the kill can land between the outbox write and marking it done.
+
+Needs real services, since the workers are separate processes.
+
+Run from the api/ directory:
+    python -m bench.multiworker --workers 1 2 4 --events 5000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import redis
+from pymongo import MongoClient
+
+from config import settings
+
+BENCH_DB = "personarelay_multiworker_bench"
+BENCH_QUEUE = "personarelay_multiworker_bench:task_updates"
+BENCH_HEARTBEAT_SECONDS = 3
+
+
+def start_workers(count: int, base_port: int) -> list[subprocess.Popen]:
+    env = dict(
+        os.environ, MONGO_DB=BENCH_DB, TASK_UPDATES_QUEUE=BENCH_QUEUE,
+        TASK_UPDATES_HEARTBEAT_SECONDS=str(BENCH_HEARTBEAT_SECONDS), PRELOAD_LAZY_MODULES="false",
+    )
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(base_port + i), "--log-level", "warning"],
+            env=env, stdout=subprocess.DEVNULL,
+        )
+        for i in range(count)
+    ]
+    for i in range(count):
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{base_port + i}/openapi.json", timeout=1)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"worker on port {base_port + i} did not start")
+                time.sleep(0.2)
+    return procs
+
+
+def stop_workers(procs: list[subprocess.Popen]):
+    for proc in procs:
+        proc.terminate()
+    for proc in procs:
+        proc.wait(timeout=15)
+
+
+def run(worker_count: int, events: int, base_port: int, timeout: float, kill_one: bool) -> dict:
+    mongo = MongoClient(settings.mongo_uri)
+    db = mongo[BENCH_DB]
+    for name in ("messages", "message_events", "counters", "persona_stats", "persona_rollups"):
+        db.drop_collection(name)
+    r = redis.Redis.from_url(settings.redis_url)
+    r.delete(BENCH_QUEUE)
+
+    ids = db.messages.insert_many([
+        {"text": f"bench {i}", "username": f"bench-user-{i % 50}", "sender": "bot",
+         "persona_name": "bench", "schedule_status": "scheduled"}
+        for i in range(events)
+    ]).inserted_ids
+    payloads = [json.dumps({"type": "update", "message_id": str(_id), "status": "posted"}) for _id in ids]
+
+    procs = start_workers(worker_count, base_port)
+    try:
+        start = time.perf_counter()
+        for i in range(0, len(payloads), 1000):
+            r.lpush(BENCH_QUEUE, *payloads[i:i + 1000])
+        deadline = time.monotonic() + timeout
+        killed = False
+        while (posted := db.messages.count_documents({"schedule_status": "posted"})) < events:
+            if time.monotonic() > deadline:
+                break
+            if kill_one and not killed and posted >= events // 3:
+                procs[0].kill()
+                killed = True
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - start
+    finally:
+        stop_workers(procs)
+        r.delete(BENCH_QUEUE)
+
+    per_message = list(db.message_events.aggregate([
+        {"$group": {"_id": "$message._id", "n": {"$sum": 1}}},
+        {"$group": {"_id": "$n", "messages": {"$sum": 1}}},
+    ]))
+    counts = {row["_id"]: row["messages"] for row in per_message}
+    processed_once = counts.get(1, 0)
+    duplicated = sum(v for k, v in counts.items() if k > 1)
+    stats = db.persona_stats.find_one({"persona_name": "bench"}) or {}
+    mongo.drop_database(BENCH_DB)
+    return {
+        "workers": worker_count,
+        "events": events,
+        "processed_once": processed_once,
+        "duplicated": duplicated,
+        "missing": events - processed_once - duplicated,
+        "counted": stats.get("posted", 0),
+        "killed": killed,
+        "events_per_s": events / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--base-port", type=int, default=8200)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--kill-one", action="store_true", help="SIGKILL one worker mid-run (needs 2+ workers)")
+    args = parser.parse_args()
+
+    results = [run(n, args.events, args.base_port, args.timeout, args.kill_one and n > 1) for n in args.workers]
+    print(f"\n{'workers':>8}{'events':>8}{'once':>8}{'dup':>6}{'missing':>9}{'counted':>9}{'killed':>8}{'events/s':>10}{'scaling':>9}")
+    baseline = results[0]["events_per_s"]
+    for row in results:
+        print(
+            f"{row['workers']:>8}{row['events']:>8}{row['processed_once']:>8}{row['duplicated']:>6}"
+            f"{row['missing']:>9}{row['counted']:>9}{str(row['killed']):>8}"
+            f"{row['events_per_s']:>10.0f}{row['events_per_s'] / baseline:>8.2f}x"
+        )
+    if any(row["missing"] or row["counted"] < row["events"] for row in results):
+        sys.exit("FAIL: some outcomes were not applied")
+    if any(row["duplicated"] and not row["killed"] for row in results):
+        sys.exit("FAIL: some outcomes were processed more than once")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Cold-start cost of the API and Celery worker entry points.
+
+Each entry point is imported in a fresh interpreter under `python -X importtime`.
+The report shows the total import time, peak RSS after import, and the
+slowest top-level imports. The API is also measured after its lazily loaded
+modules (main.LAZY_MODULES) have been imported, to show what they cost.
+
+Run from the api/ directory:
+    python -m bench.startup [--top 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ENTRY_POINTS = {
+    "api (main)": "import main",
+    "api + lazy modules": "import main, importlib; [importlib.import_module(m) for m in main.LAZY_MODULES]",
+    "worker (celery_config)": "import celery_config, celery_worker",
+}
+
+RSS_SUFFIX = "; import resource, sys; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stdout)"
+
+
+def measure(statement: str) -> tuple[list[tuple[int, int, str]], int]:
+    env = dict(os.environ, PRELOAD_LAZY_MODULES="false")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement + RSS_SUFFIX],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # name is "| " followed by two spaces per nesting level
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()[1:]))
+    # ru_maxrss is in KiB on Linux
+    return rows, int(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    for label, statement in ENTRY_POINTS.items():
+        rows, max_rss_kib = measure(statement)
+        top_level = [row for row in rows if not row[2].startswith(" ")]
+        total_ms = sum(row[1] for row in top_level) / 1000
+        print(f"\n{label}: {total_ms:.0f} ms import time, {max_rss_kib / 1024:.1f} MiB peak RSS")
+        for self_us, cumulative_us, name in sorted(top_level, key=lambda row: -row[1])[:args.top]:
+            print(f"  {cumulative_us / 1000:9.1f} ms  {name.strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Minimal NIP-01 relay stub for offline benchmarks.
+
+Accepts EVENT messages and acknowledges each with ["OK", id, true, ""],
+answers REQ with an immediate EOSE, and counts what it received. It does not
+verify signatures or store events. Point NOSTR_RELAYS at it.
+
+    python -m bench.stub_relay --port 7447 --ack-delay-ms 5
+"""
+import argparse
+import asyncio
+
+import orjson
+import websockets
+
+
+class StubRelay:
+    def __init__(self, ack_delay_ms: float = 0.0):
+        self.ack_delay = ack_delay_ms / 1000
+        self.events_received = 0
+        self.event_ids: set[str] = set()
+        self.connections = 0
+
+    async def handler(self, websocket):
+        self.connections += 1
+        try:
+            async for raw in websocket:
+                try:
+                    message = orjson.loads(raw)
+                except orjson.JSONDecodeError:
+                    await websocket.send(orjson.dumps(["NOTICE", "invalid: not json"]).decode("utf-8"))
+                    continue
+                kind = message[0] if message else None
+                if kind == "EVENT":
+                    event = message[1]
+                    self.events_received += 1
+                    self.event_ids.add(event["id"])
+                    if self.ack_delay:
+                        await asyncio.sleep(self.ack_delay)
+                    await websocket.send(orjson.dumps(["OK", event["id"], True, ""]).decode("utf-8"))
+                elif kind == "REQ":
+                    await websocket.send(orjson.dumps(["EOSE", message[1]]).decode("utf-8"))
+                elif kind == "CLOSE":
+                    await websocket.send(orjson.dumps(["CLOSED", message[1], ""]).decode("utf-8"))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 7447):
+        """Runs until cancelled."""
+        async with websockets.serve(self.handler, host, port):
+            await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7447)
+    parser.add_argument("--ack-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(StubRelay(args.ack_delay_ms).serve(args.host, args.port))
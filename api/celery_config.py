@@ -1,8 +1,8 @@
-import os
 from celery import Celery
+from config import settings
 
-CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0")
-CELERY_RESULT_BACKEND = os.environ.get("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+CELERY_BROKER_URL = settings.celery_broker_url
+CELERY_RESULT_BACKEND = settings.celery_result_backend
 
 celery_app = Celery(
     "tasks",
@@ -13,4 +13,10 @@ celery_app = Celery(
 
 celery_app.conf.update(
     task_track_started=True,
+    beat_schedule={
+        "sweep-publish-queue": {
+            "task": "tasks.flush_publish_slot",
+            "schedule": settings.publish_sweep_seconds,
+        },
+    },
 )
\ No newline at end of file
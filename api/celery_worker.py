@@ -1,12 +1,14 @@
 # celery_worker.py
 import asyncio
 import redis
+import redis.asyncio as aioredis
 import json
 from celery_config import celery_app
-from websocket_manager import manager as connection_manager
+from config import settings
 from nostr_utils import post_to_nostr_util as post_to_nostr_network
+from publish_queue import flush_due
 
-redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+redis_client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
 
 async def _async_post_and_notify(message_id: str, message_text: str):
     print(f"Executing async post for message_id: {message_id}")
@@ -36,4 +38,21 @@ def schedule_post_task(message_id: str, message_text: str):
             "message_id": message_id,
             "status": status
         })
-        redis_client.publish("task_updates", message_payload)
\ No newline at end of file
+        redis_client.lpush(settings.task_updates_queue, message_payload)
+
+
+async def _async_flush_publish_queue() -> int:
+    async_redis = aioredis.from_url(settings.redis_url, decode_responses=False)
+    try:
+        return await flush_due(async_redis)
+    finally:
+        await async_redis.close()
+
+
+@celery_app.task(name="tasks.flush_publish_slot")
+def flush_publish_slot_task():
+    """Publishes every pre-signed post that is due; outcomes go to the task updates queue."""
+    handled = asyncio.run(_async_flush_publish_queue())
+    if handled:
+        print(f"Flushed {handled} posts from the publish queue")
+    return handled
@@ -0,0 +1,106 @@
+"""
+Per-user change feed for messages.
+
+Every state change to a message (generated by /api/chat, (un)scheduled, posted
+or failed) is appended to the `message_events` outbox with a per-user sequence
+number and published on Redis so that every API process can push it to that
+user's open WebSockets. The sequence number doubles as the resume token: a
+client reconnecting with ?since=<seq> is replayed whatever it missed, or told
+to resync if the outbox no longer holds that range.
+"""
+import asyncio
+from datetime import datetime, timezone
+
+import orjson
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.database import Database
+
+from config import settings
+from serializers import serialize_message
+
+CHANGES_CHANNEL = "message_changes"
+CHANGE_RETENTION_SECONDS = settings.change_retention_seconds
+REPLAY_LIMIT = 1000
+
+
+def ensure_change_feed_indexes(db: Database):
+    db.message_events.create_index([("username", ASCENDING), ("seq", ASCENDING)], unique=True)
+    db.message_events.create_index("created_at", expireAfterSeconds=CHANGE_RETENTION_SECONDS)
+
+
+def current_seq(db: Database, username: str) -> int:
+    counter = db.counters.find_one({"_id": f"message_events:{username}"})
+    return counter["seq"] if counter else 0
+
+
+def record_change(db: Database, message_doc: dict) -> dict:
+    """Appends the new state of `message_doc` to the outbox and returns the event."""
+    username = message_doc["username"]
+    counter = db.counters.find_one_and_update(
+        {"_id": f"message_events:{username}"},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    event = {"type": "message", "seq": counter["seq"], "message": serialize_message(message_doc)}
+    db.message_events.insert_one({
+        "username": username,
+        "seq": event["seq"],
+        "created_at": datetime.now(timezone.utc),
+        "message": event["message"],
+    })
+    return event
+
+
+async def publish_change(redis_client, event: dict):
+    """
+    Fans a recorded event out to every API process. If this fails, clients
+    still get the event: the next one shows them a seq gap and they replay it.
+    """
+    await redis_client.publish(CHANGES_CHANNEL, orjson.dumps(event))
+
+
+async def emit_change(db: Database, redis_client, message_doc: dict) -> dict:
+    """Records the change and fans it out to every API process."""
+    event = record_change(db, message_doc)
+    await publish_change(redis_client, event)
+    return event
+
+
+def replay(db: Database, username: str, since: int) -> list[dict] | None:
+    """
+    Events after `since` in order, or None when the client must refetch
+    (the range was pruned by the TTL index or is larger than REPLAY_LIMIT).
+    """
+    docs = list(
+        db.message_events.find({"username": username, "seq": {"$gt": since}}, {"_id": 0, "seq": 1, "message": 1})
+        .sort("seq", ASCENDING)
+        .limit(REPLAY_LIMIT + 1)
+    )
+    if len(docs) > REPLAY_LIMIT:
+        return None
+    if docs and docs[0]["seq"] != since + 1:
+        return None
+    if not docs and current_seq(db, username) > since:
+        return None
+    return [{"type": "message", "seq": doc["seq"], "message": doc["message"]} for doc in docs]
+
+
+async def change_listener(pubsub, connection_manager):
+    """Delivers change events published by any API process to local sockets."""
+    await pubsub.subscribe(CHANGES_CHANNEL)
+    while True:
+        try:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if not (message and message["type"] == "message"):
+                continue
+            raw = message["data"]
+            event = orjson.loads(raw)
+            await connection_manager.send_event(
+                event["message"]["username"], event["seq"], raw.decode("utf-8")
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error in change listener: {e}")
+            await asyncio.sleep(1)
@@ -0,0 +1,73 @@
+"""
+Application settings, read once from the environment and api/.env.
+
+Import `settings` instead of calling load_dotenv()/os.getenv() in each module.
+Environment variables take precedence over the .env file.
+"""
+from pathlib import Path
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    # Next to this module, so uvicorn, celery and the bench scripts find it from any directory
+    model_config = SettingsConfigDict(env_file=Path(__file__).with_name(".env"), extra="ignore")
+
+    # LLM
+    io_api_key: str | None = None
+    base_endpoint: str | None = None
+
+    # Storage
+    mongo_uri: str | None = None
+    mongo_db: str = "hacks"
+    mongo_max_pool_size: int = 100
+    redis_url: str = "redis://localhost:6379/0"
+    redis_max_connections: int = 100
+    # Seconds a Redis call waits for a free pooled connection before failing
+    redis_pool_timeout: float = 5.0
+    # Redis list the Celery worker pushes post outcomes onto; each entry is
+    # held by one API process at a time until it has been applied
+    task_updates_queue: str = "task_updates"
+    # Outcomes held by an API process that stops heartbeating for this long are requeued
+    task_updates_heartbeat_seconds: float = 30.0
+    leader_lease_seconds: float = 15.0
+
+    # Auth
+    secret_key: str | None = None
+    algorithm: str = "HS256"
+    access_token_expire_minutes: int = 30
+
+    # Nostr
+    nostr_secret_key: str = ""
+    nostr_relays: str = "wss://relay.damus.io"
+    # Scheduled posts are pre-signed into this Redis sorted set and flushed per slot
+    publish_queue_key: str = "publish_queue"
+    publish_concurrency: int = 50
+    publish_batch_size: int = 1000
+    # Periodic sweep (celery beat) for posts whose slot flush task was lost
+    publish_sweep_seconds: float = 60.0
+
+    # Celery
+    celery_broker_url: str = "redis://localhost:6379/0"
+    celery_result_backend: str = "redis://localhost:6379/0"
+
+    # Throttling and change feed
+    rate_limits: str | None = None
+    daily_token_quota: int = 200_000
+    change_retention_seconds: int = 24 * 3600
+
+    # Retention
+    archive_after_days: int = 30
+    archive_batch_size: int = 500
+    retention_interval_seconds: int = 3600
+    draft_ttl_days: int = 30
+
+    # Import the agent and Celery stacks in the background after startup
+    preload_lazy_modules: bool = True
+
+    @property
+    def nostr_relay_urls(self) -> list[str]:
+        return [url.strip() for url in self.nostr_relays.split(",") if url.strip()]
+
+
+settings = Settings()
@@ -0,0 +1,72 @@
+"""
+Leader election over Redis for work that must run in exactly one API process.
+
+A leader holds a lease (SET NX PX with a random token) and renews it with a
+compare-and-PEXPIRE script; if renewal fails the leader's work is cancelled
+and another process can take over once the lease expires.
+"""
+import asyncio
+import os
+import socket
+import uuid
+
+RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLock:
+    def __init__(self, redis_client, name: str, ttl_seconds: float):
+        self.redis = redis_client
+        self.key = f"leader:{name}"
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        self._renew = redis_client.register_script(RENEW_LUA)
+        self._release = redis_client.register_script(RELEASE_LUA)
+
+    async def acquire(self) -> bool:
+        return bool(await self.redis.set(self.key, self.token, nx=True, px=self.ttl_ms))
+
+    async def renew(self) -> bool:
+        return bool(await self._renew(keys=[self.key], args=[self.token, self.ttl_ms]))
+
+    async def release(self):
+        await self._release(keys=[self.key], args=[self.token])
+
+
+async def run_as_leader(redis_client, name: str, coro_factory, ttl_seconds: float):
+    """
+    Runs coro_factory() only while this process holds the `name` lease,
+    retrying for leadership every ttl/3 seconds until cancelled.
+    """
+    lock = LeaderLock(redis_client, name, ttl_seconds)
+    interval = ttl_seconds / 3
+    while True:
+        try:
+            if await lock.acquire():
+                print(f"Acquired leadership for {name}.")
+                task = asyncio.create_task(coro_factory())
+                try:
+                    while not task.done():
+                        await asyncio.sleep(interval)
+                        if not await lock.renew():
+                            print(f"Lost leadership for {name}.")
+                            break
+                finally:
+                    task.cancel()
+                    await asyncio.shield(lock.release())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error in leader election for {name}: {e}")
+        await asyncio.sleep(interval)
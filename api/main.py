@@ -6,83 +6,208 @@ from bson import ObjectId
 import redis.asyncio as aioredis
 from bson.errors import InvalidId
 from pymongo import ReturnDocument
-from fastapi import FastAPI, Depends, HTTPException, status, Request, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Depends, HTTPException, Query, status, Request, WebSocket, WebSocketDisconnect
 import pytz
-from datetime import datetime
-from celery.result import AsyncResult
+from datetime import datetime, date
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field, BeforeValidator
 from pymongo import MongoClient
 from pymongo.database import Database
 from contextlib import asynccontextmanager
+import importlib
+import time
 from nostr_utils import post_to_nostr_util
-from dotenv import load_dotenv
-import os
 
-from agents.content_agent import get_agent_response as content_agent_response
-from agents.persona_agent import get_agent_response as persona_agent_response
+from config import settings
 import auth
-
-load_dotenv()
-from celery_config import celery_app
-from celery_worker import schedule_post_task
+from rate_limit import RateLimiter
+from serializers import (
+    MESSAGE_PROJECTION, PERSONA_PROJECTION, dumps, serialize_message, serialize_persona
+)
+from change_feed import (
+    change_listener, current_seq, emit_change, ensure_change_feed_indexes, publish_change, record_change, replay,
+)
+from retention import draft_expiry, ensure_retention_indexes, retention_loop
+from leader import run_as_leader
+from task_updates import TaskUpdatesConsumer
+import analytics
+import publish_queue
 from websocket_manager import manager as connection_manager 
 
+# The agent (iointel) and Celery stacks dominate import time, so they are
+# imported on first use and, unless disabled, warmed up in the background
+# once the app is already serving.
+LAZY_MODULES = ("agents.content_agent", "agents.persona_agent", "celery_worker")
+
+async def preload_lazy_modules():
+    for name in LAZY_MODULES:
+        try:
+            await asyncio.to_thread(importlib.import_module, name)
+        except Exception as e:
+            print(f"Failed to preload {name}: {e}")
 
-async def redis_listener(pubsub, db: Database):
-    """Listens for messages from Redis and broadcasts them via WebSocket."""
-    await pubsub.subscribe("task_updates")
-    while True:
+
+# Side effects of applying an outcome, tracked on the message until done so a
+# retried outcome finishes them without repeating the ones that succeeded
+OUTCOME_EFFECTS = ["count", "emit"]
+
+
+async def apply_task_update(db: Database, redis_client, data: dict):
+    """
+    Records a posted/failed outcome on the message, then counts it and emits
+    the change. A redelivered outcome only completes side effects an earlier
+    attempt did not finish.
+    """
+    message_id = data["message_id"]
+    status = data["status"]
+
+    outcome_fields = {"completed_at": datetime.now(pytz.UTC)}
+    # Outcomes from the publish queue also carry the event id and relay acks
+    for field in ("nostr_event_id", "relay_acks"):
+        if field in data:
+            outcome_fields[field] = data[field]
+    final_update_data = {}
+    if status == "posted":
+        # scheduled_time stays: the calendar buckets posted messages on their slot
+        final_update_data = {
+                "$set": {"schedule_status": "posted", **outcome_fields},
+                "$unset": {"task_id": ""}
+        }
+    elif status == "failed":
+        final_update_data = {"$set": {"schedule_status": "failed", **outcome_fields}}
+    if not final_update_data:
+        return
+    final_update_data["$set"]["pending_effects"] = OUTCOME_EFFECTS
+    final_doc = db.messages.find_one_and_update(
+        # Only a message not already in this state, so the outcome is applied once
+        {"_id": ObjectId(message_id), "schedule_status": {"$ne": status}},
+        final_update_data,
+        return_document=ReturnDocument.AFTER
+    )
+    if final_doc is None:
+        # Already applied: pick up side effects a failed earlier attempt left pending
+        final_doc = db.messages.find_one(
+            {"_id": ObjectId(message_id), "schedule_status": status, "pending_effects.0": {"$exists": True}}
+        )
+        if final_doc is None:
+            return
+    pending = final_doc.get("pending_effects", [])
+    if "count" in pending:
+        analytics.record(db, final_doc["username"], final_doc["persona_name"], **{status: 1})
+        db.messages.update_one({"_id": final_doc["_id"]}, {"$pull": {"pending_effects": "count"}})
+    if "emit" in pending:
+        # Done once in the outbox; a failed publish is recovered by client replay
+        event = record_change(db, final_doc)
+        db.messages.update_one({"_id": final_doc["_id"]}, {"$pull": {"pending_effects": "emit"}})
+        await publish_change(redis_client, event)
+
+
+async def redis_listener(db: Database, redis_client):
+    """
+    Consumes task outcomes pushed by the Celery worker, updates the message and
+    emits the change. Every worker can run this consumer: each outcome is
+    delivered to one process at a time and acked only once applied, so it is
+    processed at least once (see task_updates) and applied idempotently.
+    """
+    consumer = TaskUpdatesConsumer(redis_client)
+    maintenance_interval = settings.task_updates_heartbeat_seconds / 3
+    next_maintenance = 0.0
+    try:
+        while True:
+            try:
+                if time.monotonic() >= next_maintenance:
+                    await consumer.heartbeat()
+                    reclaimed = await consumer.reclaim_orphans()
+                    if reclaimed:
+                        print(f"Requeued {reclaimed} task outcomes from stopped workers.")
+                    next_maintenance = time.monotonic() + maintenance_interval
+                raw = await consumer.pop(timeout=1)
+                if raw is None:
+                    continue
+                print(f"Received message from Redis: {raw}")
+                try:
+                    data = json.loads(raw.decode("utf-8"))
+                    ObjectId(data["message_id"]), data["status"]
+                except (ValueError, KeyError, TypeError, InvalidId) as e:
+                    print(f"Dropping malformed task outcome {raw}: {e}")
+                    await consumer.ack(raw)
+                    continue
+                try:
+                    await apply_task_update(db, redis_client, data)
+                except Exception:
+                    # Put it back so it is retried rather than held until this process stops
+                    await consumer.retry(raw)
+                    raise
+                await consumer.ack(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in Redis listener: {e}")
+                await asyncio.sleep(1)
+    finally:
         try:
-            message = await pubsub.get_message(ignore_subscribe_messages=True)
-            if not (message and message["type"] == "message"):
-                continue
-            print(f"Received message from Redis: {message['data']}")
-            data = json.loads(message["data"].decode("utf-8"))
-            message_id = data["message_id"]
-            status = data["status"]
-            
-            final_update_data = {}
-            if status == "posted":
-                final_update_data = {
-                        "$set": {"schedule_status": "posted"},
-                        "$unset": {"scheduled_time": "", "task_id": ""}
-                }
-            elif status == "failed":
-                final_update_data = {"$set": {"schedule_status": "failed"}}
-            if final_update_data:
-                final_doc = db.messages.find_one_and_update(
-                    {"_id": ObjectId(message_id)},
-                    final_update_data,
-                    return_document=ReturnDocument.AFTER
-                )
-                if final_doc:
-                    await connection_manager.broadcast(Message(**final_doc).model_dump_json())
+            await consumer.close()
         except Exception as e:
-            print(f"Error in Redis listener: {e}")
-            await asyncio.sleep(1)
+            print(f"Error stopping task updates consumer: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await startup_db_client(app)
     db = app.mongodb
-    redis_client = aioredis.from_url("redis://localhost:6379", decode_responses=False)
-    pubsub = redis_client.pubsub()
-    listener_task = asyncio.create_task(redis_listener(pubsub, db))
+    redis_client = create_redis_client()
+    app.redis = redis_client
+    app.rate_limiter = RateLimiter(redis_client)
+    changes_pubsub = redis_client.pubsub()
+    listener_task = asyncio.create_task(redis_listener(db, redis_client))
+    changes_task = asyncio.create_task(change_listener(changes_pubsub, connection_manager))
+    # Retention must run in a single process when several workers are deployed
+    retention_task = asyncio.create_task(
+        run_as_leader(redis_client, "retention", lambda: retention_loop(db), settings.leader_lease_seconds)
+    )
     print("Redis listener started.")
+    if settings.preload_lazy_modules:
+        asyncio.create_task(preload_lazy_modules())
     yield
-    listener_task.cancel()
-    await pubsub.close()
+    background_tasks = (listener_task, changes_task, retention_task)
+    for task in background_tasks:
+        task.cancel()
+    # Let the consumer drop its heartbeat and the leader release its lease before Redis closes
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await changes_pubsub.close()
     await redis_client.close()
     await shutdown_db_client(app)
     print("Redis listener stopped.")
 
+def create_redis_client():
+    """
+    One pooled client per process, shared by every Redis user in the app.
+    When all connections are busy, callers wait up to redis_pool_timeout for
+    one instead of failing straight away.
+    """
+    pool = aioredis.BlockingConnectionPool.from_url(
+        settings.redis_url,
+        decode_responses=False,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout,
+    )
+    return aioredis.Redis.from_pool(pool)
+
 async def startup_db_client(app: FastAPI):
-    app.mongodb_client = MongoClient(os.getenv("MONGO_URI"))
-    app.mongodb = app.mongodb_client['hacks']
+    app.mongodb_client = MongoClient(settings.mongo_uri, maxPoolSize=settings.mongo_max_pool_size)
+    app.mongodb = app.mongodb_client[settings.mongo_db]
+    ensure_indexes(app.mongodb)
     print("MongoDB connected.")
 
+def ensure_indexes(db: Database):
+    # create_index is a no-op when the index already exists
+    db.messages.create_index([("username", 1), ("persona_name", 1), ("sender", 1)])
+    db.messages.create_index([("username", 1), ("scheduled_time", 1)])
+    ensure_change_feed_indexes(db)
+    ensure_retention_indexes(db)
+    analytics.ensure_analytics_indexes(db)
+
 async def shutdown_db_client(app: FastAPI):
     app.mongodb_client.close()
     print("Database disconnected.")
@@ -122,6 +247,7 @@ class Message(MessageBase):
     schedule_status: ScheduleStatus = Field(default='unscheduled')
     scheduled_time: datetime | None = None
     task_id: str | None = None
+    completed_at: datetime | None = None
     
     class Config:
         from_attributes = True
@@ -135,6 +261,37 @@ class ChatHistory(BaseModel):
     messages: List[Message]
     
 
+class CalendarBucket(BaseModel):
+    """Message counts for one persona on one (UTC) day, keyed by schedule status."""
+    day: str
+    persona_name: str
+    total: int
+    statuses: dict[str, int]
+
+MAX_CALENDAR_RANGE = timedelta(days=366)
+
+def as_utc(value: datetime) -> datetime:
+    """Timezone-aware UTC datetime; naive query parameters are taken to be UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=pytz.UTC)
+    return value.astimezone(pytz.UTC)
+
+class PersonaAnalytics(BaseModel):
+    """Counters for one persona (all-time, or one UTC day) and the rates derived from them."""
+    persona_name: str | None = None
+    day: str | None = None
+    generated: int
+    generation_ms_total: float
+    scheduled: int
+    rescheduled: int
+    unscheduled: int
+    posted: int
+    failed: int
+    success_rate: float | None
+    avg_generation_ms: float | None
+
+MAX_ANALYTICS_DAYS = 366
+
 class NostrPost(BaseModel):
     content: str
     
@@ -206,7 +363,7 @@ class PersonaUpdate(BaseModel):
     humor: float | None = Field(default=None, ge=0.0, le=1.0)
 
 # --- FastAPI App ---
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 origins = ["http://localhost:3000"]
 app.add_middleware(
@@ -284,6 +441,20 @@ async def get_current_user_dependency(
     return await auth.get_current_user(token, db)
 
 
+def rate_limit(endpoint: str):
+    """
+    Builds a dependency that authenticates the user and then takes a token from
+    their bucket for `endpoint`. Use it in place of get_current_user_dependency.
+    """
+    async def dependency(
+        request: Request,
+        current_user: Annotated[User, Depends(get_current_user_dependency)],
+    ) -> User:
+        await request.app.rate_limiter.hit(endpoint, current_user.username)
+        return current_user
+    return dependency
+
+
 @app.get("/api/users/me", response_model=User)
 async def read_users_me(
     current_user: Annotated[User, Depends(get_current_user_dependency)]
@@ -322,8 +493,9 @@ async def list_personas(
     """
     Retrieve all personas created by the currently authenticated user.
     """
-    personas = list(db.personas.find({"creator_id": current_user.username}))
-    return personas
+    personas = db.personas.find({"creator_id": current_user.username}, PERSONA_PROJECTION)
+    # Trusted DB documents: skip response_model re-validation.
+    return ORJSONResponse([serialize_persona(doc) for doc in personas])
 
 
 # non idiomatic but one user can have one persona of that name, so
@@ -409,8 +581,9 @@ async def delete_persona(
 @app.post("/api/chat", response_model=Message)
 async def chat(
     request: ChatRequest,  # Use the new model here
-    current_user: Annotated[User, Depends(get_current_user_dependency)],
+    current_user: Annotated[User, Depends(rate_limit("chat"))],
     db: Annotated[Database, Depends(get_database)], # This line protects the endpoint
+    http_request: Request,
 ) -> Message:
     print(f"Chat request from user: {current_user.username}") # You can now see who is chatting
     
@@ -422,13 +595,12 @@ async def chat(
             "creator_id": current_user.username
     })
 
-    text_response = await content_agent_response(last_user_message, persona)
-    #go through the text of the message and find any instances of </think>. Find the last instance of </think> and replace the word
-    #with the portion after this tag
-    if "</think>" in text_response:
-        last_think_idx = text_response.rfind("</think>")
-        text_response = text_response[last_think_idx + len("</think>") :]
-        text_response = text_response.lstrip()
+    await http_request.app.rate_limiter.check_quota(current_user.username)
+    from agents.content_agent import get_agent_response as content_agent_response
+    generation_start = time.perf_counter()
+    text_response, tokens_used = await content_agent_response(last_user_message, persona)
+    generation_ms = (time.perf_counter() - generation_start) * 1000
+    await http_request.app.rate_limiter.record_usage(current_user.username, tokens_used)
     bot_response = MessageBase(
         text=text_response,
         sender='bot',
@@ -437,8 +609,15 @@ async def chat(
     )
 
     
-    result = db.messages.insert_one(bot_response.model_dump())
+    message_doc = bot_response.model_dump()
+    message_doc["schedule_status"] = "unscheduled"
+    expires_at = draft_expiry()
+    if expires_at is not None:
+        message_doc["draft_expires_at"] = expires_at
+    result = db.messages.insert_one(message_doc)
     generated_message = db.messages.find_one({"_id": result.inserted_id})
+    analytics.record(db, current_user.username, persona_name, generated=1, generation_ms_total=generation_ms)
+    await emit_change(db, http_request.app.redis, generated_message)
     
     return generated_message
 
@@ -448,19 +627,173 @@ async def list_messages(
     current_user: Annotated[User, Depends(get_current_user_dependency)],
     db: Annotated[Database, Depends(get_database)],
 ):
-    messages = list(db.messages.find({"username": current_user.username, "persona_name": persona_name, "sender": "bot"}))
-    return messages
-    
+    messages = db.messages.find(
+        {"username": current_user.username, "persona_name": persona_name, "sender": "bot"},
+        MESSAGE_PROJECTION,
+    )
+    # Trusted DB documents: skip response_model re-validation.
+    return ORJSONResponse([serialize_message(doc) for doc in messages])
+
+
+@app.get("/api/messages/history", response_model=List[Message])
+async def message_history(
+    persona_name: str,
+    current_user: Annotated[User, Depends(get_current_user_dependency)],
+    db: Annotated[Database, Depends(get_database)],
+    before: datetime | None = None,
+    before_id: str | None = None,
+    limit: int = Query(default=50, ge=1, le=500),
+):
+    """
+    Archived (posted or failed) messages, newest first. Page through with
+    `before` and `before_id` set to the completed_at and _id of the last
+    message received; the _id breaks ties between equal timestamps.
+    """
+    query = {"username": current_user.username, "persona_name": persona_name}
+    if before is not None and before_id is not None:
+        try:
+            last_id = ObjectId(before_id)
+        except InvalidId:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid message ID format.")
+        query["$or"] = [
+            {"completed_at": {"$lt": before}},
+            {"completed_at": before, "_id": {"$lt": last_id}},
+        ]
+    elif before is not None:
+        query["completed_at"] = {"$lt": before}
+    messages = (
+        db.messages_archive.find(query, MESSAGE_PROJECTION)
+        .sort([("completed_at", -1), ("_id", -1)])
+        .limit(limit)
+    )
+    return ORJSONResponse([serialize_message(doc) for doc in messages])
+
+
+@app.get("/api/calendar", response_model=List[CalendarBucket])
+async def calendar_buckets(
+    start: datetime,
+    end: datetime,
+    current_user: Annotated[User, Depends(get_current_user_dependency)],
+    db: Annotated[Database, Depends(get_database)],
+    persona_name: str | None = None,
+):
+    """
+    Per-day, per-persona counts of messages whose scheduled_time falls in
+    [start, end), grouped by schedule status. Posted and failed messages keep
+    their scheduled_time, so they are bucketed on the slot they were scheduled
+    for. Archived messages are included, so months older than
+    ARCHIVE_AFTER_DAYS still show what was posted. Message bodies are loaded
+    per day via /api/calendar/{day}.
+    """
+    # Mixing an aware and a naive bound would otherwise raise on comparison
+    start, end = as_utc(start), as_utc(end)
+    if end <= start or end - start > MAX_CALENDAR_RANGE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid date range.")
+
+    match = {"username": current_user.username, "scheduled_time": {"$gte": start, "$lt": end}}
+    if persona_name is not None:
+        match["persona_name"] = persona_name
+    pipeline = [
+        {"$match": match},
+        {"$unionWith": {"coll": "messages_archive", "pipeline": [{"$match": match}]}},
+        # A message is briefly in both collections while it is being archived
+        {"$group": {
+            "_id": "$_id",
+            "scheduled_time": {"$first": "$scheduled_time"},
+            "persona_name": {"$first": "$persona_name"},
+            "schedule_status": {"$first": "$schedule_status"},
+        }},
+        {"$group": {
+            "_id": {
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$scheduled_time"}},
+                "persona_name": "$persona_name",
+                "status": {"$ifNull": ["$schedule_status", "unscheduled"]},
+            },
+            "count": {"$sum": 1},
+        }},
+        {"$group": {
+            "_id": {"day": "$_id.day", "persona_name": "$_id.persona_name"},
+            "total": {"$sum": "$count"},
+            "statuses": {"$push": {"k": "$_id.status", "v": "$count"}},
+        }},
+        {"$project": {
+            "_id": 0,
+            "day": "$_id.day",
+            "persona_name": "$_id.persona_name",
+            "total": 1,
+            "statuses": {"$arrayToObject": "$statuses"},
+        }},
+        {"$sort": {"day": 1, "persona_name": 1}},
+    ]
+    return ORJSONResponse(list(db.messages.aggregate(pipeline)))
+
+
+@app.get("/api/calendar/{day}", response_model=List[Message])
+async def calendar_day(
+    day: date,
+    current_user: Annotated[User, Depends(get_current_user_dependency)],
+    db: Annotated[Database, Depends(get_database)],
+    persona_name: str | None = None,
+):
+    """
+    Drill-down for a single calendar day: the full messages scheduled on `day`
+    (UTC), archived ones included.
+    """
+    day_start = datetime(day.year, day.month, day.day, tzinfo=pytz.UTC)
+    query = {
+        "username": current_user.username,
+        "scheduled_time": {"$gte": day_start, "$lt": day_start + timedelta(days=1)},
+    }
+    if persona_name is not None:
+        query["persona_name"] = persona_name
+    messages = {}
+    for collection in (db.messages, db.messages_archive):
+        for doc in collection.find(query, MESSAGE_PROJECTION):
+            # A message is briefly in both collections while it is being archived
+            messages.setdefault(doc["_id"], doc)
+    ordered = sorted(messages.values(), key=lambda doc: doc["scheduled_time"])
+    return ORJSONResponse([serialize_message(doc) for doc in ordered])
+
+@app.get("/api/analytics/personas", response_model=List[PersonaAnalytics])
+async def persona_analytics(
+    current_user: Annotated[User, Depends(get_current_user_dependency)],
+    db: Annotated[Database, Depends(get_database)],
+):
+    """
+    All-time counters per persona. Read from the incrementally maintained
+    persona_stats collection; messages are never aggregated here.
+    """
+    return ORJSONResponse(analytics.persona_stats(db, current_user.username))
+
+
+@app.get("/api/analytics/personas/{persona_name}", response_model=List[PersonaAnalytics])
+async def persona_analytics_daily(
+    persona_name: str,
+    current_user: Annotated[User, Depends(get_current_user_dependency)],
+    db: Annotated[Database, Depends(get_database)],
+    days: int = Query(default=30, ge=1, le=MAX_ANALYTICS_DAYS),
+):
+    """
+    Daily (UTC) counters for one persona over the last `days` days, oldest
+    first. Days without activity are omitted.
+    """
+    return ORJSONResponse(analytics.persona_rollups(db, current_user.username, persona_name, days))
+
+
 @app.post("/api/personas/generate", response_model=PersonaCreate)
 async def generate_persona(
     persona_request: PersonaGenerateRequest,
-    current_user: Annotated[User, Depends(get_current_user_dependency)]
+    current_user: Annotated[User, Depends(rate_limit("persona_generate"))],
+    request: Request,
 ):
     if not persona_request.sample_post:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Sample post is required.")
 
     # Call the persona agent to generate the persona
-    persona_data = await persona_agent_response(persona_request.sample_post)
+    await request.app.rate_limiter.check_quota(current_user.username)
+    from agents.persona_agent import get_agent_response as persona_agent_response
+    persona_data, tokens_used = await persona_agent_response(persona_request.sample_post)
+    await request.app.rate_limiter.record_usage(current_user.username, tokens_used)
 
     # Create a Persona object from the generated data, don't save to DB as the user needs to verify it first
     persona_create = PersonaCreate(**persona_data, creator_id=current_user.username)
@@ -471,7 +804,7 @@ async def generate_persona(
 @app.post("/api/nostr/post", status_code=status.HTTP_200_OK)
 async def post_to_nostr(
     post: NostrPost,
-    current_user: Annotated[User, Depends(get_current_user_dependency)],
+    current_user: Annotated[User, Depends(rate_limit("nostr_post"))],
 ):
 
     # Here you would implement the logic to post to Nostr
@@ -485,45 +818,55 @@ async def post_to_nostr(
 @app.post("/api/schedule")
 async def schedule_post(req: ScheduleRequest,
                         current_user: Annotated[User, Depends(get_current_user_dependency)],
-                        db: Annotated[Database, Depends(get_database)]):
+                        db: Annotated[Database, Depends(get_database)],
+                        request: Request):
+    from celery_worker import flush_publish_slot_task
     # Fetch message details from your database
     message_data = db.messages.find_one({"_id": ObjectId(req.message_id), "username": current_user.username})
     if not message_data:
         raise HTTPException(status_code=404, detail="Message not found")
     target_time_utc = req.start_date.replace(hour=9, minute=0, second=0, microsecond=0).astimezone(pytz.UTC)
     now_utc = datetime.now(pytz.UTC)
+    # Identifies this scheduling of the message; the client unschedules by it
     task_id = f"post-task-{req.message_id}-{int(datetime.now().timestamp())}"
+    due = max(target_time_utc, now_utc)
+    # Sign now, publish with everything else due in the same slot
+    await publish_queue.enqueue(request.app.redis, req.message_id, message_data['text'], due)
     if target_time_utc < now_utc:
         print(f"Executing immediately for message_id: {req.message_id}")
-        task = schedule_post_task.apply_async(
-            args=[req.message_id, message_data['text']],
-            task_id=task_id,
-        )
+        flush_publish_slot_task.apply_async()
     else:
         print(f"Scheduling for future for message_id: {req.message_id} at {target_time_utc}")
-        task = schedule_post_task.apply_async(
-            args=[req.message_id, message_data['text']],
-            task_id=task_id,
-            eta=target_time_utc
-        )
+        slot_ts = int(target_time_utc.timestamp())
+        # Only the first post scheduled into a slot creates its flush task
+        slot_key_ttl = slot_ts - int(now_utc.timestamp()) + 24 * 3600
+        if await request.app.redis.set(f"publish_slot:{slot_ts}", 1, nx=True, ex=slot_key_ttl):
+            flush_publish_slot_task.apply_async(task_id=f"publish-slot-{slot_ts}", eta=target_time_utc)
     updated_message = db.messages.find_one_and_update(
         {"_id": ObjectId(req.message_id)},
-        {"$set": {
-            "schedule_status": "scheduled",
-            "scheduled_time": target_time_utc,
-            "task_id": task_id
-        }},
+        {
+            "$set": {
+                "schedule_status": "scheduled",
+                "scheduled_time": target_time_utc,
+                "task_id": task_id
+            },
+            "$unset": {"draft_expires_at": ""}
+        },
         return_document=ReturnDocument.AFTER
     )
 
     if not updated_message:
-        celery_app.control.revoke(task_id, terminate=True)
+        await publish_queue.dequeue(request.app.redis, req.message_id)
         raise HTTPException(status_code=500, detail="Failed to update message state.")
     
+    rescheduled = message_data.get("schedule_status") == "scheduled"
+    analytics.record(db, current_user.username, updated_message["persona_name"],
+                     **{"rescheduled" if rescheduled else "scheduled": 1})
+    await emit_change(db, request.app.redis, updated_message)
     return Message(**updated_message)
 
 @app.delete("/api/schedule/{task_id}")
-async def unschedule_post(task_id: str,current_user: Annotated[User, Depends(get_current_user_dependency)], db: Annotated[Database, Depends(get_database)]):
+async def unschedule_post(task_id: str,current_user: Annotated[User, Depends(get_current_user_dependency)], db: Annotated[Database, Depends(get_database)], request: Request):
     message_to_unschedule = db.messages.find_one({
         "task_id": task_id, 
         "username": current_user.username
@@ -532,23 +875,56 @@ async def unschedule_post(task_id: str,current_user: Annotated[User, Depends(get
     if not message_to_unschedule:
         raise HTTPException(status_code=404, detail="Scheduled task not found or you don't have permission.")
     
+    await publish_queue.dequeue(request.app.redis, str(message_to_unschedule["_id"]))
+    # Posts scheduled before the publish queue still have their own Celery task
+    from celery_config import celery_app
     celery_app.control.revoke(task_id, terminate=True, signal='SIGKILL')
     
+    unscheduled_fields = {"schedule_status": "unscheduled"}
+    expires_at = draft_expiry()
+    if expires_at is not None:
+        unscheduled_fields["draft_expires_at"] = expires_at
     updated_message = db.messages.find_one_and_update(
         {"_id": message_to_unschedule["_id"]},
         {
-            "$set": {"schedule_status": "unscheduled"},
+            "$set": unscheduled_fields,
             "$unset": {"scheduled_time": "", "task_id": ""}
         },
         return_document=ReturnDocument.AFTER
     )
 
+    analytics.record(db, current_user.username, updated_message["persona_name"], unscheduled=1)
+    await emit_change(db, request.app.redis, updated_message)
     return Message(**updated_message)
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await connection_manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, token: str, since: int | None = None):
+    """
+    Pushes the user's message change events. On connect the client gets
+    {"type": "hello", "seq": n}; reconnecting with ?since=<last seq seen> replays
+    missed events, or sends {"type": "resync"} when the list must be refetched.
+    """
+    db = websocket.app.mongodb
+    try:
+        user = await auth.get_current_user(token, db)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await connection_manager.connect(websocket, user.username)
     try:
+        # Hold live delivery to this socket until the replay is out, so events stay in seq order
+        async with connection_manager.lock(websocket):
+            seq = current_seq(db, user.username)
+            await websocket.send_text(dumps({"type": "hello", "seq": seq}))
+            if since is not None and since < seq:
+                events = replay(db, user.username, since)
+                if events is None:
+                    await websocket.send_text(dumps({"type": "resync", "seq": seq}))
+                else:
+                    for event in events:
+                        await websocket.send_text(dumps(event))
+                    connection_manager.mark_replayed(websocket, events[-1]["seq"] if events else since)
         while True:
             # Keep the connection alive
             await websocket.receive_text()
@@ -1,16 +1,20 @@
-from dotenv import load_dotenv
-import os
-from typing import Any, Dict, List, Optional
-from nostr_sdk import Client, EventBuilder, Keys, NostrSigner
-load_dotenv()
+from typing import Any
+from config import settings
+
+# Comma-separated NOSTR_RELAYS; the load-test harness points this at a local stub.
+NOSTR_RELAYS = settings.nostr_relay_urls
 
 async def post_to_nostr_util(content: str) -> Any:
+    # nostr_sdk loads a large native library; only pay for it when posting
+    from nostr_sdk import Client, EventBuilder, Keys, NostrSigner
+
     print("boof")
-    keys = Keys.parse(os.getenv("NOSTR_SECRET_KEY", ""))
+    keys = Keys.parse(settings.nostr_secret_key)
     signer = NostrSigner.keys(keys)
     client = Client(signer)
 
-    await client.add_relay("wss://relay.damus.io")
+    for relay in NOSTR_RELAYS:
+        await client.add_relay(relay)
     await client.connect()
 
     builder = EventBuilder.text_note(content)
@@ -0,0 +1,141 @@
+"""
+Pre-signed, batched publishing of scheduled Nostr posts.
+
+When a post is scheduled its note is signed straight away (with created_at set
+to the slot time) and parked in Redis: a sorted set keyed by due time plus a
+hash of signed events. At the slot, a single Celery task claims everything
+due in one atomic step and publishes it over one shared relay connection with
+bounded concurrency, then reports each outcome and its relay acks on the
+task updates queue for the API to record on the message.
+"""
+import asyncio
+import json
+import time
+from datetime import datetime
+from functools import lru_cache
+
+from config import settings
+
+EVENTS_HASH_SUFFIX = ":events"
+
+# Atomically pops up to ARGV[2] members due at or before ARGV[1] together with
+# their signed events, so concurrent flushes never publish the same post twice.
+CLAIM_DUE_LUA = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+if #ids == 0 then
+    return {}
+end
+local events = redis.call('HMGET', KEYS[2], unpack(ids))
+redis.call('ZREM', KEYS[1], unpack(ids))
+redis.call('HDEL', KEYS[2], unpack(ids))
+local out = {}
+for i, id in ipairs(ids) do
+    out[#out + 1] = id
+    out[#out + 1] = events[i] or false
+end
+return out
+"""
+
+
+@lru_cache(maxsize=1)
+def signing_keys():
+    """NOSTR_SECRET_KEY parsed once per process."""
+    from nostr_sdk import Keys
+    return Keys.parse(settings.nostr_secret_key)
+
+
+def sign_note(content: str, created_at: datetime) -> str:
+    """Signs a text note dated `created_at` and returns the event JSON."""
+    from nostr_sdk import EventBuilder, Timestamp
+
+    builder = EventBuilder.text_note(content).custom_created_at(Timestamp.from_secs(int(created_at.timestamp())))
+    return builder.sign_with_keys(signing_keys()).as_json()
+
+
+def _events_key() -> str:
+    return settings.publish_queue_key + EVENTS_HASH_SUFFIX
+
+
+async def enqueue(redis_client, message_id: str, content: str, due: datetime):
+    """Signs the post and schedules it for `due`; re-enqueueing replaces the previous entry."""
+    event_json = await asyncio.to_thread(sign_note, content, due)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(_events_key(), message_id, event_json)
+        pipe.zadd(settings.publish_queue_key, {message_id: due.timestamp()})
+        await pipe.execute()
+
+
+async def dequeue(redis_client, message_id: str) -> bool:
+    """Removes a pending post; returns False if it was not queued (already claimed)."""
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.zrem(settings.publish_queue_key, message_id)
+        pipe.hdel(_events_key(), message_id)
+        removed, _ = await pipe.execute()
+    return bool(removed)
+
+
+async def claim_due(redis_client, now: float, limit: int) -> list[tuple[str, str | None]]:
+    raw = await redis_client.eval(CLAIM_DUE_LUA, 2, settings.publish_queue_key, _events_key(), now, limit)
+    pairs = []
+    for i in range(0, len(raw), 2):
+        message_id = raw[i].decode("utf-8") if isinstance(raw[i], bytes) else raw[i]
+        event_json = raw[i + 1]
+        if isinstance(event_json, bytes):
+            event_json = event_json.decode("utf-8")
+        pairs.append((message_id, event_json or None))
+    return pairs
+
+
+async def _publish(client, message_id: str, event_json: str | None, semaphore: asyncio.Semaphore) -> dict:
+    from nostr_sdk import Event
+
+    outcome = {"type": "update", "message_id": message_id, "status": "failed"}
+    if event_json is None:
+        return outcome
+    async with semaphore:
+        try:
+            output = await client.send_event(Event.from_json(event_json))
+        except Exception as e:
+            print(f"Failed to publish message_id: {message_id}. Error: {e}")
+            return outcome
+    accepted = [str(url) for url in output.success]
+    # Rejections are a list, not a dict keyed by URL: relay URLs contain dots,
+    # which MongoDB before 5.0 refuses in field names
+    rejected = [{"relay": str(url), "reason": reason} for url, reason in output.failed.items()]
+    outcome.update(
+        status="posted" if accepted else "failed",
+        nostr_event_id=output.id.to_hex(),
+        relay_acks={"accepted": accepted, "rejected": rejected},
+    )
+    return outcome
+
+
+async def flush_due(redis_client, now: float | None = None) -> int:
+    """
+    Publishes every post due at `now` (default: current time) through one relay
+    connection and pushes the outcomes onto the task updates queue.
+    Returns the number of posts handled.
+    """
+    from nostr_sdk import Client, NostrSigner
+
+    now = time.time() if now is None else now
+    client = None
+    handled = 0
+    try:
+        while True:
+            batch = await claim_due(redis_client, now, settings.publish_batch_size)
+            if not batch:
+                break
+            if client is None:
+                client = Client(NostrSigner.keys(signing_keys()))
+                for relay in settings.nostr_relay_urls:
+                    await client.add_relay(relay)
+                await client.connect()
+            semaphore = asyncio.Semaphore(settings.publish_concurrency)
+            outcomes = await asyncio.gather(*(_publish(client, message_id, event_json, semaphore) for message_id, event_json in batch))
+            await redis_client.lpush(settings.task_updates_queue, *(json.dumps(outcome) for outcome in outcomes))
+            handled += len(batch)
+    finally:
+        if client is not None:
+            await client.disconnect()
+    return handled
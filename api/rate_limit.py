@@ -0,0 +1,115 @@
+import time
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, status
+
+from config import settings
+
+# Token bucket kept in a single Redis hash per (endpoint, user). The whole
+# refill + take happens inside one EVALSHA round trip, so concurrent requests
+# from several API processes can never overdraw a bucket.
+TOKEN_BUCKET_LUA = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+
+redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(retry_after)}
+"""
+
+# Default limits as (tokens refilled per second, bucket capacity).
+DEFAULT_LIMITS = {
+    "chat": (0.2, 5),
+    "persona_generate": (0.05, 3),
+    "nostr_post": (0.1, 5),
+}
+
+DAILY_TOKEN_QUOTA = settings.daily_token_quota
+
+
+def parse_limits(spec: str | None) -> dict[str, tuple[float, int]]:
+    """
+    Parses RATE_LIMITS of the form "chat=0.2/5,nostr_post=1/10" into
+    {endpoint: (rate, capacity)}, falling back to DEFAULT_LIMITS.
+    """
+    limits = dict(DEFAULT_LIMITS)
+    if not spec:
+        return limits
+    for entry in spec.split(","):
+        if not entry.strip():
+            continue
+        name, _, value = entry.partition("=")
+        rate, _, capacity = value.partition("/")
+        limits[name.strip()] = (float(rate), int(capacity))
+    return limits
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough LLM token count (~4 characters per token) used for quota accounting."""
+    return sum(len(text or "") for text in texts) // 4 + 1
+
+
+class RateLimiter:
+    def __init__(self, redis_client, limits: dict[str, tuple[float, int]] | None = None):
+        self.redis = redis_client
+        self.limits = limits if limits is not None else parse_limits(settings.rate_limits)
+        self._take = redis_client.register_script(TOKEN_BUCKET_LUA)
+
+    async def hit(self, endpoint: str, username: str, cost: int = 1):
+        """Takes `cost` tokens from the user's bucket or raises a 429."""
+        if endpoint not in self.limits:
+            return
+        rate, capacity = self.limits[endpoint]
+        allowed, retry_after = await self._take(
+            keys=[f"ratelimit:{endpoint}:{username}"],
+            args=[rate, capacity, time.time(), cost],
+        )
+        if not int(allowed):
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded. Please slow down.",
+                headers={"Retry-After": str(max(1, int(float(retry_after) + 0.999)))},
+            )
+
+    @staticmethod
+    def _quota_key(username: str) -> str:
+        return f"quota:tokens:{username}:{datetime.now(timezone.utc):%Y%m%d}"
+
+    async def check_quota(self, username: str):
+        """Raises a 429 once the user's LLM token usage for today reaches DAILY_TOKEN_QUOTA."""
+        used = await self.redis.get(self._quota_key(username))
+        if used is not None and int(used) >= DAILY_TOKEN_QUOTA:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Daily generation quota exhausted.",
+            )
+
+    async def record_usage(self, username: str, tokens: int) -> int:
+        """Adds `tokens` to today's usage counter and returns the new total."""
+        key = self._quota_key(username)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.incrby(key, tokens)
+            pipe.expire(key, 2 * 24 * 3600)
+            total, _ = await pipe.execute()
+        return int(total)
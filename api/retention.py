@@ -0,0 +1,111 @@
+"""
+Retention for the `messages` collection.
+
+Posted and failed messages are moved to `messages_archive` in batches once
+they are older than ARCHIVE_AFTER_DAYS, keeping the hot collection small for
+/api/messages; they stay readable via /api/messages/history and the calendar.
+Unscheduled drafts carry a `draft_expires_at` timestamp (cleared while
+scheduled) which a TTL index uses to expire abandoned ones.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReplaceOne
+from pymongo.database import Database
+
+from config import settings
+
+COMPLETED_STATUSES = ["posted", "failed"]
+
+
+def draft_expiry() -> datetime | None:
+    """Value for `draft_expires_at` on a new or unscheduled draft, or None if drafts never expire."""
+    if settings.draft_ttl_days <= 0:
+        return None
+    return datetime.now(timezone.utc) + timedelta(days=settings.draft_ttl_days)
+
+
+def ensure_retention_indexes(db: Database):
+    db.messages.create_index("draft_expires_at", expireAfterSeconds=0)
+    db.messages.create_index([("schedule_status", ASCENDING), ("completed_at", ASCENDING)])
+    db.messages_archive.create_index([
+        ("username", ASCENDING), ("persona_name", ASCENDING), ("completed_at", DESCENDING), ("_id", DESCENDING),
+    ])
+    # The calendar reads archived messages by slot too
+    db.messages_archive.create_index([("username", ASCENDING), ("scheduled_time", ASCENDING)])
+
+
+def backfill_archived_completed_at(db: Database) -> int:
+    """
+    Gives archived messages that predate completed_at their creation time
+    instead, so /api/messages/history can sort and page through them.
+    Returns the number of messages updated.
+    """
+    result = db.messages_archive.update_many(
+        {"completed_at": {"$exists": False}},
+        [{"$set": {"completed_at": {"$toDate": "$_id"}}}],
+    )
+    return result.modified_count
+
+
+def archive_completed_messages(db: Database, older_than: timedelta, batch_size: int) -> int:
+    """
+    Moves posted/failed messages completed before now - older_than into
+    messages_archive. Each batch is upserted into the archive before it is
+    deleted from messages, so an interrupted run can simply be repeated.
+    Returns the number of messages moved.
+    """
+    cutoff = datetime.now(timezone.utc) - older_than
+    query = {
+        "schedule_status": {"$in": COMPLETED_STATUSES},
+        "$or": [
+            {"completed_at": {"$lt": cutoff}},
+            # Completed before completed_at was recorded: fall back to creation time
+            {"completed_at": {"$exists": False}, "_id": {"$lt": ObjectId.from_datetime(cutoff)}},
+        ],
+    }
+    moved = 0
+    while True:
+        batch = list(db.messages.find(query).limit(batch_size))
+        if not batch:
+            break
+        for doc in batch:
+            # Completed before completed_at was recorded: history pages on it, so use creation time
+            doc.setdefault("completed_at", doc["_id"].generation_time)
+        db.messages_archive.bulk_write([ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in batch], ordered=False)
+        ids = [doc["_id"] for doc in batch]
+        # Re-check the query: a message rescheduled since the find must stay in messages
+        deleted = db.messages.delete_many({"_id": {"$in": ids}, **query}).deleted_count
+        if deleted < len(batch):
+            kept = [doc["_id"] for doc in db.messages.find({"_id": {"$in": ids}}, {"_id": 1})]
+            db.messages_archive.delete_many({"_id": {"$in": kept}})
+        moved += deleted
+        if len(batch) < batch_size:
+            break
+    return moved
+
+
+async def retention_loop(db: Database):
+    """Periodically archives completed messages, off the event loop."""
+    try:
+        backfilled = await asyncio.to_thread(backfill_archived_completed_at, db)
+        if backfilled:
+            print(f"Backfilled completed_at on {backfilled} archived messages.")
+    except Exception as e:
+        print(f"Error backfilling archived messages: {e}")
+    while True:
+        try:
+            moved = await asyncio.to_thread(
+                archive_completed_messages,
+                db,
+                timedelta(days=settings.archive_after_days),
+                settings.archive_batch_size,
+            )
+            if moved:
+                print(f"Archived {moved} completed messages.")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error in retention loop: {e}")
+        await asyncio.sleep(settings.retention_interval_seconds)
@@ -0,0 +1,52 @@
+"""
+Fast-path serialization for documents read straight from MongoDB.
+
+The documents in `messages` and `personas` are only ever written through the
+validated Pydantic models in main.py, so re-validating every field on the way
+out is wasted work. These helpers produce the same JSON shape as the
+response models (ObjectId as a string under `_id`, defaults filled in)
+without building a model instance per document.
+"""
+import orjson
+
+MESSAGE_FIELDS = (
+    "text", "username", "sender", "persona_name", "schedule_status", "scheduled_time", "task_id", "completed_at",
+)
+MESSAGE_DEFAULTS = {"schedule_status": "unscheduled", "scheduled_time": None, "task_id": None, "completed_at": None}
+
+PERSONA_FIELDS = (
+    "name", "age", "role", "style", "domain_knowledge", "quirks", "bio", "lore",
+    "personality", "conversation_style", "emotional_stability", "friendliness",
+    "creativity", "curiosity", "formality", "empathy", "humor", "creator_id",
+)
+PERSONA_DEFAULTS = {
+    "domain_knowledge": (), "quirks": "", "bio": "", "lore": "",
+    "personality": "", "conversation_style": "",
+}
+
+# Mongo projections so the driver only decodes what we return.
+MESSAGE_PROJECTION = {field: 1 for field in MESSAGE_FIELDS}
+PERSONA_PROJECTION = {field: 1 for field in PERSONA_FIELDS}
+
+
+def _from_doc(doc: dict, fields: tuple, defaults: dict) -> dict:
+    out = {"_id": str(doc["_id"])}
+    for field in fields:
+        value = doc.get(field)
+        out[field] = defaults.get(field) if value is None else value
+    return out
+
+
+def serialize_message(doc: dict) -> dict:
+    """Converts a trusted `messages` document into the Message response shape."""
+    return _from_doc(doc, MESSAGE_FIELDS, MESSAGE_DEFAULTS)
+
+
+def serialize_persona(doc: dict) -> dict:
+    """Converts a trusted `personas` document into the Persona response shape."""
+    return _from_doc(doc, PERSONA_FIELDS, PERSONA_DEFAULTS)
+
+
+def dumps(data) -> str:
+    """orjson-encodes `data` for text frames (WebSocket, Redis payloads)."""
+    return orjson.dumps(data).decode("utf-8")
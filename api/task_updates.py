@@ -0,0 +1,62 @@
+"""
+At-least-once consumption of the task updates queue.
+
+Each API process BLMOVEs an outcome from the queue into its own processing
+list and only LREMs it once the message has been updated, so an outcome
+popped just before a crash or shutdown is not lost. A process keeps a
+heartbeat key alive while it runs; the processing lists of processes whose
+heartbeat has expired are pushed back onto the consuming end of the queue by
+whichever process notices first. Applying an outcome must therefore be
+idempotent: a redelivered one may already have been applied.
+"""
+import os
+import socket
+import uuid
+
+from config import settings
+
+
+class TaskUpdatesConsumer:
+    def __init__(self, redis_client, queue: str | None = None, heartbeat_ttl_seconds: float | None = None):
+        self.redis = redis_client
+        self.queue = queue or settings.task_updates_queue
+        self.ttl_ms = int((heartbeat_ttl_seconds or settings.task_updates_heartbeat_seconds) * 1000)
+        consumer_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        self.processing_prefix = f"{self.queue}:processing:"
+        self.heartbeat_prefix = f"{self.queue}:consumer:"
+        self.processing_key = self.processing_prefix + consumer_id
+        self.heartbeat_key = self.heartbeat_prefix + consumer_id
+
+    async def heartbeat(self):
+        await self.redis.set(self.heartbeat_key, 1, px=self.ttl_ms)
+
+    async def pop(self, timeout: float) -> bytes | None:
+        """Moves the next outcome into this process's processing list and returns it."""
+        return await self.redis.blmove(self.queue, self.processing_key, timeout, "RIGHT", "LEFT")
+
+    async def ack(self, raw: bytes):
+        await self.redis.lrem(self.processing_key, 1, raw)
+
+    async def retry(self, raw: bytes):
+        """Returns an outcome that failed to apply to the consuming end of the queue."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.processing_key, 1, raw)
+            pipe.rpush(self.queue, raw)
+            await pipe.execute()
+
+    async def reclaim_orphans(self) -> int:
+        """Requeues outcomes held by processes that stopped without acking them."""
+        reclaimed = 0
+        async for key in self.redis.scan_iter(match=self.processing_prefix + "*"):
+            key = key.decode("utf-8") if isinstance(key, bytes) else key
+            consumer_id = key[len(self.processing_prefix):]
+            if key == self.processing_key or await self.redis.exists(self.heartbeat_prefix + consumer_id):
+                continue
+            # LMOVE is atomic per item, so concurrent reclaimers never duplicate an outcome
+            while await self.redis.lmove(key, self.queue, "LEFT", "RIGHT") is not None:
+                reclaimed += 1
+        return reclaimed
+
+    async def close(self):
+        """Stops heartbeating; anything still unacked is reclaimed once the key expires."""
+        await self.redis.delete(self.heartbeat_key)
@@ -0,0 +1,188 @@
+"""
+Post-processing for LLM output shared by the agents and the API.
+
+Reasoning models (DeepSeek-R1 and friends) wrap their chain of thought in
+<think>...</think>, sometimes omit the opening tag, and occasionally leave a
+block unclosed. Everything here handles those cases in a single left-to-right
+pass instead of repeated regex scans over what can be very large outputs.
+"""
+import re
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+HASHTAG_RE = re.compile(r"(?<![\w#])#(\w+)")
+JSON_OBJECT_RE = re.compile(r"\{.*?\}", re.DOTALL)
+RUN_OF_SPACES_RE = re.compile(r"[ \t]{2,}")
+
+# Hard character limits per target platform. Nostr has no protocol limit, but
+# most clients collapse notes past a couple of thousand characters.
+PLATFORM_LIMITS = {
+    "nostr": 2000,
+    "twitter": 280,
+}
+
+
+def split_thoughts(text: str) -> tuple[list[str], str]:
+    """
+    Separates reasoning from content in one pass.
+    Returns (thoughts, content) where content has surrounding whitespace stripped.
+    A closing tag outside any block means the model omitted the opening tag,
+    so everything before the last such tag is thought; an unclosed opening
+    tag treats everything after it as thought.
+    """
+    thoughts = []
+    content = []
+    pos = 0
+    next_open = text.find(THINK_OPEN)
+    next_close = text.find(THINK_CLOSE)
+
+    while True:
+        if next_open != -1 and next_open < pos:
+            next_open = text.find(THINK_OPEN, pos)
+        if next_close != -1 and next_close < pos:
+            next_close = text.find(THINK_CLOSE, pos)
+        if next_close != -1 and (next_open == -1 or next_close < next_open):
+            # Stray </think>: all the content so far was reasoning
+            thoughts.append("".join(content) + text[pos:next_close])
+            content = []
+            pos = next_close + len(THINK_CLOSE)
+            continue
+        if next_open == -1:
+            content.append(text[pos:])
+            break
+        content.append(text[pos:next_open])
+        pos = next_open + len(THINK_OPEN)
+        end = next_close
+        if end == -1:
+            thoughts.append(text[pos:])
+            break
+        thoughts.append(text[pos:end])
+        pos = end + len(THINK_CLOSE)
+
+    return thoughts, "".join(content).strip()
+
+
+def strip_thoughts(text: str) -> str:
+    """Returns only the non-reasoning content of `text`."""
+    return split_thoughts(text)[1]
+
+
+class ThinkStreamStripper:
+    """
+    Incremental variant of strip_thoughts for streamed completions.
+    feed() returns all the visible text so far (not just the new part), with
+    a tail that could be the start of a tag held back until the next chunk.
+    A stray closing tag turns the text before it into a thought, as in
+    split_thoughts, so the visible text can shrink: render each return value
+    in place of the previous one. After finish() it equals strip_thoughts
+    of the whole output, before whitespace is stripped.
+    """
+
+    def __init__(self, starts_in_think: bool = False):
+        self._buffer = ""
+        self._in_think = starts_in_think
+        self._thought_parts: list[list[str]] = [[]] if starts_in_think else []
+        self._content: list[str] = []
+
+    @property
+    def thoughts(self) -> list[str]:
+        return ["".join(parts) for parts in self._thought_parts]
+
+    @staticmethod
+    def _partial_tag_len(text: str, tag: str) -> int:
+        for size in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:size]):
+                return size
+        return 0
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        while True:
+            if self._in_think:
+                end = self._buffer.find(THINK_CLOSE)
+                if end == -1:
+                    keep = self._partial_tag_len(self._buffer, THINK_CLOSE)
+                    self._append_thought(self._buffer[:len(self._buffer) - keep])
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                self._append_thought(self._buffer[:end])
+                self._buffer = self._buffer[end + len(THINK_CLOSE):]
+                self._in_think = False
+                continue
+
+            start = self._buffer.find(THINK_OPEN)
+            stray = self._buffer.find(THINK_CLOSE)
+            if stray != -1 and (start == -1 or stray < start):
+                # Opening tag omitted by the model: all the content so far was reasoning
+                self._thought_parts.append(self._content + [self._buffer[:stray]])
+                self._content = []
+                self._buffer = self._buffer[stray + len(THINK_CLOSE):]
+                continue
+            if start == -1:
+                keep = max(self._partial_tag_len(self._buffer, THINK_OPEN),
+                           self._partial_tag_len(self._buffer, THINK_CLOSE))
+                self._content.append(self._buffer[:len(self._buffer) - keep])
+                self._buffer = self._buffer[len(self._buffer) - keep:]
+                break
+            self._content.append(self._buffer[:start])
+            self._buffer = self._buffer[start + len(THINK_OPEN):]
+            self._in_think = True
+            self._thought_parts.append([])
+        return "".join(self._content)
+
+    def _append_thought(self, text: str):
+        if not self._thought_parts:
+            self._thought_parts.append([])
+        self._thought_parts[-1].append(text)
+
+    def finish(self) -> str:
+        """Flushes whatever is still buffered at the end of the stream and returns the visible text."""
+        rest, self._buffer = self._buffer, ""
+        if self._in_think:
+            self._append_thought(rest)
+        else:
+            self._content.append(rest)
+        return "".join(self._content)
+
+
+def extract_hashtags(text: str) -> list[str]:
+    """Returns the hashtags in `text` lowercased, de-duplicated, in order of appearance."""
+    seen = {}
+    for match in HASHTAG_RE.finditer(text):
+        seen.setdefault(match.group(1).lower(), None)
+    return list(seen)
+
+
+def normalize_hashtags(text: str, max_tags: int | None = None) -> str:
+    """
+    Drops repeated hashtags (case-insensitive, first spelling wins) and,
+    if max_tags is set, any hashtags beyond that count.
+    """
+    seen = set()
+
+    def keep_first(match: re.Match) -> str:
+        tag = match.group(1).lower()
+        if tag in seen or (max_tags is not None and len(seen) >= max_tags):
+            return ""
+        seen.add(tag)
+        return match.group(0)
+
+    cleaned = HASHTAG_RE.sub(keep_first, text)
+    return RUN_OF_SPACES_RE.sub(" ", cleaned).strip()
+
+
+def enforce_length(text: str, platform: str = "nostr") -> str:
+    """Truncates `text` on a word boundary to fit the platform's character limit."""
+    limit = PLATFORM_LIMITS.get(platform)
+    if limit is None or len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    if cut <= 0:
+        cut = limit - 1
+    return text[:cut].rstrip() + "…"
+
+
+def clean_post(text: str, platform: str = "nostr") -> str:
+    """Full pipeline for generated posts: strip reasoning, tidy hashtags, fit the platform."""
+    return enforce_length(normalize_hashtags(strip_thoughts(text)), platform)
@@ -1,22 +1,47 @@
+import asyncio
+
 from fastapi import WebSocket
 
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: list[WebSocket] = []
+        self.user_connections: dict[str, list[WebSocket]] = {}
+        # Highest seq delivered to a socket by replay; live events at or below it were already sent
+        self.replay_watermarks: dict[WebSocket, int] = {}
+        self.locks: dict[WebSocket, asyncio.Lock] = {}
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, username: str):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.locks[websocket] = asyncio.Lock()
+        self.replay_watermarks[websocket] = 0
+        self.user_connections.setdefault(username, []).append(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        self.locks.pop(websocket, None)
+        self.replay_watermarks.pop(websocket, None)
+        for username, connections in list(self.user_connections.items()):
+            if websocket in connections:
+                connections.remove(websocket)
+                if not connections:
+                    del self.user_connections[username]
+
+    def lock(self, websocket: WebSocket) -> asyncio.Lock:
+        """Held while replaying missed events; live events for the socket wait on it."""
+        return self.locks[websocket]
+
+    def mark_replayed(self, websocket: WebSocket, last_seq: int):
+        self.replay_watermarks[websocket] = last_seq
 
-    async def broadcast(self, data: dict):
-        living_connections = self.active_connections[:]
-        for connection in living_connections:
+    async def send_event(self, username: str, seq: int, data: str):
+        """Delivers a change event to every socket of `username`."""
+        for connection in self.user_connections.get(username, [])[:]:
+            lock = self.locks.get(connection)
+            if lock is None:
+                continue
             try:
-                await connection.send_json(data)
+                async with lock:
+                    if seq > self.replay_watermarks.get(connection, 0):
+                        await connection.send_text(data)
             except Exception:
                 self.disconnect(connection)
 
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
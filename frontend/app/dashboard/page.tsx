@@ -52,7 +52,7 @@ const Page = () => {
           {messagesError && <p className="p-4 text-center text-red-500">Error loading messages.</p>}
           {/* Use the PostScheduler here */}
           {!messagesLoading && !messagesError && (
-            <PostScheduler messages={messages as Message[] || []} handlePost={handlePostNostr} />
+            <PostScheduler messages={messages as Message[] || []} personaName={selectedPersona} handlePost={handlePostNostr} />
           )}
         </main>
       </div>
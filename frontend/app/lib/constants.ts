@@ -3,4 +3,5 @@ export const PERSONAS_BASE_URL = API_BASE_URL + "/" + "personas";
 export const MESSAGES_BASE_URL = API_BASE_URL + "/" + "messages";
 export const CHAT_BASE_URL = API_BASE_URL + "/" + "chat";
 export const USER_CHECK_URL = API_BASE_URL + "/" + "users/me";
-export const SCHEDULING_BASE_URL = API_BASE_URL + "/" + "schedule";
\ No newline at end of file
+export const SCHEDULING_BASE_URL = API_BASE_URL + "/" + "schedule";
+export const WS_URL = process.env.WS_URL || 'ws://localhost:8000/ws';
\ No newline at end of file
@@ -49,7 +49,12 @@ export const useMessages = (selectedPersona: string) => {
     // add the selectedPersona as a query parameter to the URL
     const MESSAGES_BASE_URL_WITH_PERSONA = `${MESSAGES_BASE_URL}?persona_name=${selectedPersona}`;
 
-    const { data, error, isLoading } = useSWR(MESSAGES_BASE_URL_WITH_PERSONA ,authedFetcher)
+    // Kept current by the /ws change feed, which revalidates on resync; refetching
+    // the whole list on every focus or reconnect would undo that
+    const { data, error, isLoading } = useSWR(MESSAGES_BASE_URL_WITH_PERSONA, authedFetcher, {
+        revalidateOnFocus: false,
+        revalidateOnReconnect: false,
+    })
 
     return {
         messages: data,
@@ -4,7 +4,9 @@ import React, { useCallback, useMemo, useState, useRef, useEffect } from 'react'
 import { Calendar, Views, dateFnsLocalizer } from 'react-big-calendar';
 // Make sure these fetchers are updated to handle the new API responses
 import { schedulePostOnBackend, unschedulePostOnBackend } from '@/app/lib/fetchers'; 
+import { MESSAGES_BASE_URL, WS_URL } from '@/app/lib/constants';
 import useWebSocket from 'react-use-websocket';
+import { mutate } from 'swr';
 import withDragAndDrop from 'react-big-calendar/lib/addons/dragAndDrop';
 import { format, parse, startOfWeek, getDay, isSameDay } from 'date-fns';
 import { TrashIcon, XIcon } from 'lucide-react';
@@ -34,9 +36,16 @@ interface CalendarEvent {
 
 interface PostSchedulerProps {
     messages: Message[];
+    personaName: string;
     handlePost: (message: string) => void;
 }
 
+// Change events pushed over /ws (see api/change_feed.py)
+type ChangeEvent =
+    | { type: 'hello'; seq: number }
+    | { type: 'resync'; seq: number }
+    | { type: 'message'; seq: number; message: Message };
+
 const containerVariants = {
   hidden: { opacity: 0 },
   visible: {
@@ -47,7 +56,7 @@ const containerVariants = {
   }
 };
 
-const PostScheduler = ({ messages, handlePost }: PostSchedulerProps) => {
+const PostScheduler = ({ messages, personaName, handlePost }: PostSchedulerProps) => {
     const [calendarEvents, setCalendarEvents] = useState<CalendarEvent[]>([]);
     const [unscheduled, setUnscheduled] = useState<Message[]>([]);
 
@@ -91,17 +100,23 @@ const PostScheduler = ({ messages, handlePost }: PostSchedulerProps) => {
         setUnscheduled(initialUnscheduled);
     }, [messages]); // This runs once when the component gets the messages prop
 
-    const { lastJsonMessage } = useWebSocket('ws://localhost:8000/ws', {
-        onOpen: () => console.log('WebSocket connected'),
-        onClose: () => console.log('WebSocket disconnected'),
-        shouldReconnect: () => true,
-    });
+    // Last change seq applied; sent back as ?since= on reconnect so only missed deltas are replayed.
+    // Every seq up to it has been applied, so anything at or below it is a duplicate.
+    const lastSeq = useRef<number | null>(null);
+    // Set while reconnecting to fill a gap, so a burst of out-of-order frames triggers one reconnect
+    const catchingUp = useRef(false);
+    // Only connect once signed in: without a token the server closes with 1008
+    const [hasToken, setHasToken] = useState(false);
+    useEffect(() => setHasToken(Boolean(localStorage.getItem("accessToken"))), []);
+    const getSocketUrl = useCallback(() => {
+        const token = localStorage.getItem("accessToken");
+        const since = lastSeq.current !== null ? `&since=${lastSeq.current}` : '';
+        return `${WS_URL}?token=${token}${since}`;
+    }, []);
 
-    useEffect(() => {
-        if (!lastJsonMessage) return;
-        
-        const updatedMessage: Message = lastJsonMessage
-        if(updatedMessage.text)
+    const applyMessage = useCallback((updatedMessage: Message) => {
+        if (updatedMessage.persona_name !== personaName) return;
+        if (updatedMessage.schedule_status === 'posted')
         toast.success("Posted! : " + updatedMessage.text.substring(0, 30) + '...');
 
         if (updatedMessage.schedule_status === 'unscheduled') {
@@ -124,7 +139,43 @@ const PostScheduler = ({ messages, handlePost }: PostSchedulerProps) => {
                 });
             }
         }
-    }, [lastJsonMessage]);
+    }, [personaName]);
+
+    // Frames are handled one by one in onMessage: reading lastJsonMessage in an effect
+    // would skip events when several frames arrive within one render.
+    const { getWebSocket } = useWebSocket<ChangeEvent>(getSocketUrl, {
+        onOpen: () => console.log('WebSocket connected'),
+        onClose: () => console.log('WebSocket disconnected'),
+        onMessage: (frame: MessageEvent) => handleChange(JSON.parse(frame.data) as ChangeEvent),
+        // 1008: the token was rejected, retrying with it cannot succeed
+        shouldReconnect: (closeEvent: CloseEvent) => closeEvent.code !== 1008,
+    }, hasToken);
+
+    const handleChange = (change: ChangeEvent) => {
+        if (change.type === 'hello') {
+            catchingUp.current = false;
+            if (lastSeq.current === null) lastSeq.current = change.seq;
+            return;
+        }
+        if (change.type === 'resync') {
+            // Too far behind to replay: refetch the lists once
+            lastSeq.current = change.seq;
+            mutate((key) => typeof key === 'string' && key.startsWith(MESSAGES_BASE_URL));
+            return;
+        }
+        if (change.type !== 'message' || lastSeq.current === null || change.seq <= lastSeq.current) return;
+        if (change.seq !== lastSeq.current + 1) {
+            // Events from different emitters can be published out of order: reconnect
+            // with ?since= so the server replays the gap in seq order
+            if (!catchingUp.current) {
+                catchingUp.current = true;
+                getWebSocket()?.close();
+            }
+            return;
+        }
+        lastSeq.current = change.seq;
+        applyMessage(change.message);
+    };
 
     const handleDragStartFromOutside = useCallback((message: Message) => {
         setDraggedEventFromOutside(message);